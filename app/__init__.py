@@ -1,7 +1,3 @@
-import logging
-import os
-from logging.handlers import RotatingFileHandler
-
 from flask import Flask
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -10,6 +6,7 @@ from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.middleware.proxy_fix import ProxyFix
 
+from app.bin.ratelimit import SQLiteStorage  # noqa: F401  registers "sqlite://"
 from config import Config
 
 db = SQLAlchemy()
@@ -19,7 +16,7 @@ login.login_view = "auth.login"
 login.login_message = "Please log in to access this page."
 login.login_message_category = "info"
 login.session_protection = "strong"
-limiter = Limiter(key_func=get_remote_address, default_limits=["60 per hour"])
+limiter = Limiter(key_func=get_remote_address)
 
 
 def create_app(config_class=Config):
@@ -27,10 +24,40 @@ def create_app(config_class=Config):
     app.config.from_object(config_class)
     app.wsgi_app = ProxyFix(app.wsgi_app, x_for=2, x_host=2)  # type: ignore
 
+    from app.bin.database import attach_sqlite_pragmas, configure_sqlite
+
+    configure_sqlite(app)
     db.init_app(app)
+    with app.app_context():
+        attach_sqlite_pragmas(app, db.engine)
     migrate.init_app(app, db)
     login.init_app(app)
 
+    from app.services import journal, metrics
+
+    # Before the limiter, so rejected requests are counted as well.
+    metrics.init_app(app)
+    limiter.init_app(app)
+    journal.init_app(app)
+
+    from app.bin.cache import fragments
+    from app.models import user_cache
+    from app.services.passwords import password_hasher
+
+    user_cache.configure(
+        maxsize=app.config["USER_CACHE_SIZE"], ttl=app.config["USER_CACHE_TTL_SECONDS"]
+    )
+    fragments.configure(
+        path=app.config["FRAGMENT_CACHE_PATH"],
+        max_bytes=app.config["FRAGMENT_CACHE_MAX_BYTES"],
+    )
+    password_hasher.configure(
+        method=app.config["PASSWORD_HASH_METHOD"],
+        workers=app.config["PASSWORD_HASH_WORKERS"],
+        max_queue=app.config["PASSWORD_HASH_MAX_QUEUE"],
+        timeout=app.config["PASSWORD_HASH_TIMEOUT_SECONDS"],
+    )
+
     from app.views.auth import bp as auth_bp
 
     limiter.limit("30 per hour")(auth_bp)
@@ -45,26 +72,13 @@ def create_app(config_class=Config):
 
     app.register_blueprint(main_bp)
 
-    # Setup logging
-    if app.config["LOG_TO_STDOUT"]:
-        stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(logging.INFO)
-        app.logger.addHandler(stream_handler)
-    else:
-        if not os.path.exists("logs"):
-            os.mkdir("logs")
-        file_handler = RotatingFileHandler(
-            "logs/flask.log", maxBytes=10240, backupCount=10
-        )
-        file_handler.setFormatter(
-            logging.Formatter(
-                "%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]"
-            )
-        )
-        file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
-
-    app.logger.setLevel(logging.INFO)
+    from app.views.metrics import bp as metrics_bp
+
+    app.register_blueprint(metrics_bp)
+
+    from app.bin.logs import setup_logging
+
+    setup_logging(app)
     app.logger.info("Flask App startup")
     return app
 
@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """A small thread-safe LRU cache whose entries also expire after ttl seconds."""
+
+    def __init__(self, maxsize=128, ttl=30) -> None:
+        self.maxsize = int(maxsize)
+        self.ttl = float(ttl)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, maxsize, ttl):
+        with self._lock:
+            self.maxsize = int(maxsize)
+            self.ttl = float(ttl)
+            self._entries.clear()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SharedCache:
+    """A size-bounded LRU cache of text values shared by all gunicorn workers.
+
+    Entries live in a WAL-mode SQLite file, so a page rendered by one worker is
+    served by all of them. Keys are expected to carry their own version (e.g.
+    the catalog generation), so there is no expiry; once the stored values add
+    up to more than max_bytes the least recently used ones are evicted.
+    """
+
+    def __init__(self, path=None, max_bytes=32 * 1024 * 1024) -> None:
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self._local = threading.local()
+
+    def configure(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self._local = threading.local()
+        if self.enabled:
+            self.connection().execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entry (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+
+    @property
+    def enabled(self):
+        return bool(self.path) and self.max_bytes > 0
+
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key, default=None):
+        if not self.enabled:
+            return default
+        now = time.time()
+        try:
+            connection = self.connection()
+            row = connection.execute(
+                "SELECT value, accessed_at FROM cache_entry WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return default
+            value, accessed_at = row
+            if now - accessed_at > 1:
+                # Recency only needs to be roughly right; skip most of the writes.
+                connection.execute(
+                    "UPDATE cache_entry SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+        except sqlite3.Error:
+            # A busy or broken cache file is a cache miss, not a failed request.
+            return default
+        return value
+
+    def set(self, key, value):
+        if not self.enabled or len(value) > self.max_bytes:
+            return
+        connection = self.connection()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entry (key, value, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            connection.execute(
+                """
+                DELETE FROM cache_entry WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS total
+                        FROM cache_entry
+                    ) WHERE total > ?
+                )
+                """,
+                (self.max_bytes,),
+            )
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+
+    def clear(self):
+        if self.enabled:
+            self.connection().execute("DELETE FROM cache_entry")
+
+
+# Rendered pages of the file table, keyed on the catalog generation.
+fragments = SharedCache()
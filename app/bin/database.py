@@ -0,0 +1,64 @@
+import sqlalchemy as sa
+
+JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SYNCHRONOUS_LEVELS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def is_sqlite(uri):
+    return bool(uri) and uri.startswith("sqlite")
+
+
+def sqlite_pragmas(config):
+    """Return the PRAGMA statements every new SQLite connection runs."""
+    journal_mode = config["SQLITE_JOURNAL_MODE"].upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"Unsupported SQLITE_JOURNAL_MODE '{journal_mode}'.")
+    synchronous = config["SQLITE_SYNCHRONOUS"].upper()
+    if synchronous not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"Unsupported SQLITE_SYNCHRONOUS '{synchronous}'.")
+    return [
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+    ]
+
+
+def configure_sqlite(app):
+    """Set engine options for the SQLite profile; call before db.init_app.
+
+    Every gunicorn worker gets its own pool, sized for its request threads plus
+    the watcher and job threads, so connections are reused instead of being
+    opened (and re-running the pragmas) per request.
+    """
+    if not app.config["SQLITE_PROFILE_ENABLED"] or not is_sqlite(
+        app.config["SQLALCHEMY_DATABASE_URI"]
+    ):
+        return
+    options = app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+    if ":memory:" not in app.config["SQLALCHEMY_DATABASE_URI"]:
+        options.setdefault("pool_size", int(app.config["SQLITE_POOL_SIZE"]))
+        options.setdefault("max_overflow", int(app.config["SQLITE_MAX_OVERFLOW"]))
+    connect_args = options.setdefault("connect_args", {})
+    connect_args.setdefault("timeout", int(app.config["SQLITE_BUSY_TIMEOUT_MS"]) / 1000)
+    connect_args.setdefault("cached_statements", 256)
+
+
+def attach_sqlite_pragmas(app, engine):
+    """Run the profile's PRAGMAs on every new connection; call after db.init_app.
+
+    WAL lets readers carry on while a worker writes, and with synchronous=NORMAL
+    a commit no longer waits for an fsync (only checkpoints do).
+    """
+    if not app.config["SQLITE_PROFILE_ENABLED"] or engine.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas(app.config)
+
+    @sa.event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
@@ -0,0 +1,88 @@
+import fcntl
+import os
+import threading
+import time
+from pathlib import Path
+
+
+class ProcessLock:
+    """An advisory file lock used to elect a single process among gunicorn workers.
+
+    The lock is tied to the open file description, so it is released automatically
+    when the holding worker exits and another worker can take over.
+    """
+
+    def __init__(self, name, lock_dir) -> None:
+        self.path = Path(lock_dir) / f"pai-admin-{name}.lock"
+        self._fd = None
+
+    @property
+    def acquired(self):
+        return self._fd is not None
+
+    def acquire(self):
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class Heartbeat:
+    """A file whose mtime a thread refreshes every interval seconds while some
+    work is running, so other processes can tell that it is alive without
+    probing the lock that elected it.
+    """
+
+    def __init__(self, name, lock_dir, interval) -> None:
+        self.path = Path(lock_dir) / f"pai-admin-{name}.heartbeat"
+        self.interval = float(interval)
+        self._stop_event = None
+        self._thread = None
+
+    def beat(self):
+        self.path.touch()
+
+    def run(self, stop_event):
+        while not stop_event.wait(self.interval):
+            try:
+                self.beat()
+            except OSError:
+                pass
+
+    def start(self):
+        self.beat()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self.run,
+            args=(self._stop_event,),
+            name=f"pai-admin-{self.path.stem}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop_event.set()  # type: ignore
+            self._thread.join()
+            self._stop_event = self._thread = None
+        self.path.unlink(missing_ok=True)
+
+    def is_alive(self):
+        """Return True if the heartbeat was refreshed within three intervals."""
+        try:
+            age = time.time() - self.path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        return age < 3 * self.interval
@@ -0,0 +1,115 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, request
+from flask_login import current_user
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]"
+
+access_logger = logging.getLogger("pai_admin.access")
+access_logger.propagate = False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed as extra={"fields": {...}} are merged in."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def make_handler(app, filename, formatter):
+    if app.config["LOG_TO_STDOUT"]:
+        handler = logging.StreamHandler()
+    else:
+        if not os.path.exists("logs"):
+            os.mkdir("logs")
+        handler = RotatingFileHandler(
+            os.path.join("logs", filename),
+            maxBytes=int(app.config["LOG_MAX_BYTES"]),
+            backupCount=int(app.config["LOG_BACKUP_COUNT"]),
+        )
+    if formatter is not None:
+        handler.setFormatter(formatter)
+    handler.setLevel(logging.INFO)
+    return handler
+
+
+def queue_to(logger, handler):
+    """Attach handler to logger through a queue drained by a background thread.
+
+    Request threads only put the record on the queue; formatting the line and
+    writing (and rotating) the file happen on the listener thread.
+    """
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(QueueHandler(log_queue))
+    return listener
+
+
+def setup_logging(app):
+    if app.config["LOG_FORMAT"] == "json":
+        formatter = JsonFormatter()
+    elif app.config["LOG_TO_STDOUT"]:
+        formatter = None
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT)
+    queue_to(app.logger, make_handler(app, "flask.log", formatter))
+    app.logger.setLevel(logging.INFO)
+
+    if app.config["ACCESS_LOG_ENABLED"]:
+        queue_to(access_logger, make_handler(app, "access.log", JsonFormatter()))
+        access_logger.setLevel(logging.INFO)
+        app.before_request(start_request_timer)
+        app.after_request(log_access)
+
+
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+def log_access(response):
+    started = g.get("request_started")
+    access_logger.info(
+        "%s %s %s",
+        request.method,
+        request.path,
+        response.status_code,
+        extra={
+            "fields": {
+                "method": request.method,
+                "path": request.path,
+                "route": request.url_rule.rule if request.url_rule else None,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                # Time to the first byte for streamed responses such as SSE.
+                "duration_ms": (
+                    round((time.perf_counter() - started) * 1000, 3)
+                    if started is not None
+                    else None
+                ),
+                "user": (
+                    current_user.username if current_user.is_authenticated else None
+                ),
+                "ip": request.remote_addr,
+            }
+        },
+    )
+    return response
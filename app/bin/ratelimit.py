@@ -0,0 +1,199 @@
+import os
+import sqlite3
+import threading
+import time
+
+from limits.storage import MovingWindowSupport, Storage
+
+
+class SQLiteStorage(Storage, MovingWindowSupport):
+    """Rate limit storage shared by all gunicorn workers through one SQLite file.
+
+    Registered for ``sqlite:///relative.db`` and ``sqlite:////absolute.db``
+    storage URIs. The database runs in WAL mode and every check is a single short
+    write transaction, so workers only serialize on the actual increment.
+    Expired counters and window entries are purged periodically, which keeps the
+    file from growing with the number of distinct clients.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(
+        self,
+        uri,
+        wrap_exceptions=False,
+        busy_timeout=5000,
+        purge_interval=60,
+        **options,
+    ) -> None:
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        path = uri.split("://", 1)[1].removeprefix("/")
+        self.path = os.path.abspath(path)
+        self.busy_timeout = int(busy_timeout)
+        self.purge_interval = float(purge_interval)
+        self._local = threading.local()
+        self._next_purge = 0.0
+        self.connection().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rate_limit_counter (
+                key TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS rate_limit_entry (
+                key TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_rate_limit_entry_key
+                ON rate_limit_entry (key, created_at);
+            CREATE INDEX IF NOT EXISTS ix_rate_limit_entry_expires_at
+                ON rate_limit_entry (expires_at);
+            """
+        )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def connection(self):
+        """Return this thread's connection, opening it on first use or after a fork."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=self.busy_timeout / 1000, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def transaction(self):
+        return _Transaction(self.connection())
+
+    def purge_expired(self, now):
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self.purge_interval
+        with self.transaction() as connection:
+            connection.execute(
+                "DELETE FROM rate_limit_counter WHERE expires_at <= ?", (now,)
+            )
+            connection.execute(
+                "DELETE FROM rate_limit_entry WHERE expires_at <= ?", (now,)
+            )
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = time.time()
+        self.purge_expired(now)
+        with self.transaction() as connection:
+            (count,) = connection.execute(
+                """
+                INSERT INTO rate_limit_counter (key, count, expires_at)
+                VALUES (:key, :amount, :expires_at)
+                ON CONFLICT (key) DO UPDATE SET
+                    count = CASE WHEN expires_at <= :now THEN :amount
+                        ELSE count + :amount END,
+                    expires_at = CASE WHEN expires_at <= :now OR :elastic
+                        THEN :expires_at ELSE expires_at END
+                RETURNING count
+                """,
+                {
+                    "key": key,
+                    "amount": amount,
+                    "expires_at": now + expiry,
+                    "now": now,
+                    "elastic": elastic_expiry,
+                },
+            ).fetchone()
+        return count
+
+    def get(self, key):
+        row = (
+            self.connection()
+            .execute(
+                "SELECT count FROM rate_limit_counter WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = (
+            self.connection()
+            .execute(
+                "SELECT expires_at FROM rate_limit_counter WHERE key = ? AND expires_at > ?",
+                (key, now),
+            )
+            .fetchone()
+        )
+        return int(row[0] if row else now)
+
+    def acquire_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        self.purge_expired(now)
+        with self.transaction() as connection:
+            (acquired,) = connection.execute(
+                "SELECT COUNT(*) FROM rate_limit_entry WHERE key = ? AND created_at > ?",
+                (key, now - expiry),
+            ).fetchone()
+            if acquired + amount > limit:
+                return False
+            connection.executemany(
+                "INSERT INTO rate_limit_entry (key, created_at, expires_at) VALUES (?, ?, ?)",
+                [(key, now, now + expiry)] * amount,
+            )
+        return True
+
+    def get_moving_window(self, key, limit, expiry):
+        now = time.time()
+        start, acquired = (
+            self.connection()
+            .execute(
+                "SELECT MIN(created_at), COUNT(*) FROM rate_limit_entry WHERE key = ? AND created_at > ?",
+                (key, now - expiry),
+            )
+            .fetchone()
+        )
+        return int(start or now), acquired
+
+    def check(self):
+        try:
+            self.connection().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        with self.transaction() as connection:
+            counters = connection.execute("DELETE FROM rate_limit_counter").rowcount
+            entries = connection.execute("DELETE FROM rate_limit_entry").rowcount
+        return counters + entries
+
+    def clear(self, key):
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM rate_limit_counter WHERE key = ?", (key,))
+            connection.execute("DELETE FROM rate_limit_entry WHERE key = ?", (key,))
+
+
+class _Transaction:
+    """Run the statements of a with block in one BEGIN IMMEDIATE transaction.
+
+    IMMEDIATE takes the write lock up front, so a concurrent check in another
+    worker waits on busy_timeout instead of failing on lock upgrade.
+    """
+
+    def __init__(self, connection) -> None:
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
@@ -1,6 +1,8 @@
-from urllib.parse import urlencode
+import hashlib
+import unicodedata
+from urllib.parse import quote, urlencode
 
-from flask import current_app, request
+from flask import current_app, make_response, request
 from flask_login import current_user
 
 
@@ -26,3 +28,51 @@ def log_request():
         current_app.logger.info(
             f"IP:{request.remote_addr} - Method:{request.method} URL:{request.full_path}"
         )
+
+
+def set_content_disposition(response, download_name, as_attachment):
+    """Content-Disposition as flask.send_file sets it, with an RFC 2231
+    filename* for names that are not ASCII."""
+    try:
+        download_name.encode("ascii")
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize("NFKD", download_name)
+        simple = simple.encode("ascii", "ignore").decode("ascii")
+        names = {
+            "filename": simple,
+            "filename*": f"UTF-8''{quote(download_name, safe='!#$&+^`|~')}",
+        }
+    else:
+        names = {"filename": download_name}
+    response.headers.set(
+        "Content-Disposition", "attachment" if as_attachment else "inline", **names
+    )
+
+
+def format_size(size):
+    """Human readable size in decimal units, like the MB of the file table."""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(size) < 1000 or unit == "TB":
+            break
+        size /= 1000
+    return f"{size:.0f} {unit}" if unit == "B" else f"{size:.2f} {unit}"
+
+
+def make_etag(*parts):
+    """Strong ETag for a response that is fully determined by parts."""
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode()).hexdigest()[:32]
+
+
+def conditional_response(etag, render):
+    """Answer If-None-Match with a 304 without calling render, else render.
+
+    "no-cache" makes the browser revalidate on every request (htmx polls
+    included) and reuse its copy when the server answers 304.
+    """
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(render())
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
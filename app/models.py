@@ -1,4 +1,3 @@
-import os
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
@@ -7,9 +6,11 @@ import sqlalchemy as sa
 import sqlalchemy.orm as so
 from flask import current_app
 from flask_login import UserMixin
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from app import db, login
+from app.bin.cache import TTLCache
 
 
 class User(UserMixin, db.Model):  # type: ignore
@@ -19,52 +20,375 @@ class User(UserMixin, db.Model):  # type: ignore
     username: so.Mapped[str] = so.mapped_column(sa.String(64), index=True, unique=True)
     email: so.Mapped[str] = so.mapped_column(sa.String(120), index=True, unique=True)
     password_hash: so.Mapped[Optional[str]] = so.mapped_column(sa.String(256))
+    # Bumped whenever the credentials change. It is part of the session id (see
+    # get_id), so sessions and cached users from before the change stop matching.
+    version: so.Mapped[int] = so.mapped_column(default=1, server_default="1")
 
     def __repr__(self) -> str:
         return f"<User {self.username}>"
 
+    def get_id(self):
+        return f"{self.id}:{self.version}"
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(
+            password, method=current_app.config["PASSWORD_HASH_METHOD"]
+        )
+        self.version = (self.version or 0) + 1
+        user_cache.pop(self.id)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)  # type: ignore
 
 
+# Users loaded by load_user, keyed on id. Entries are detached from the
+# session that loaded them and only used while their version matches the
+# session's. set_password evicts the entry in this worker; other workers (and
+# deletes through manage.py) are bounded by USER_CACHE_TTL_SECONDS.
+user_cache = TTLCache()
+
+
 @login.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    try:
+        id, version = (int(part) for part in user_id.split(":"))
+    except ValueError:
+        # Session from before user ids carried a version: log in again.
+        return None
+    user = user_cache.get(id)
+    if user is not None and user.version == version:
+        return user
+    user = db.session.get(User, id)
+    if user is None or user.version != version:
+        return None
+    db.session.expunge(user)
+    user_cache.set(id, user)
+    return user
 
 
 class File(db.Model):  # type: ignore
     __tablename__ = "file"
 
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
-    name: so.Mapped[str] = so.mapped_column(sa.String(200), index=True, unique=True)
+    name: so.Mapped[str] = so.mapped_column(sa.String(200), index=True)
+    # Path relative to DATA_DIR, with "/" separators; unique, unlike name.
     full_name: so.Mapped[Optional[str]] = so.mapped_column(
-        sa.String(250), index=True, unique=True
+        sa.String(1024), index=True, unique=True
     )
+    # active_history: StorageUsage needs the old values when these change.
     extension: so.Mapped[Optional[str]] = so.mapped_column(
-        sa.String(10), index=True, unique=False
+        sa.String(10), index=True, unique=False, active_history=True
     )
-    size: so.Mapped[Optional[int]]
+    size: so.Mapped[Optional[int]] = so.mapped_column(index=True, active_history=True)
+    mtime: so.Mapped[Optional[float]]
+    content_hash: so.Mapped[Optional[str]] = so.mapped_column(sa.String(64), index=True)
     upload_date: so.Mapped[Optional[datetime]] = so.mapped_column(
-        default=lambda: datetime.now(timezone.utc)
+        index=True, default=lambda: datetime.now(timezone.utc)
     )
 
     def __repr__(self) -> str:
         return f"<File {self.name}>"
 
     def set_fullname(self):
-        basedir = current_app.config["DATA_DIR"]
-        self.full_name = os.path.join(basedir, self.name)
+        self.full_name = self.name
+
+    @property
+    def path(self):
+        return Path(current_app.config["DATA_DIR"]) / self.full_name  # type: ignore
 
     def delete_file(self):
-        current_app.logger.info(f"Deleting file '{self.name}' from DB and directory.")
+        current_app.logger.info(
+            f"Deleting file '{self.full_name}' from DB and directory."
+        )
         if current_app.config["DELETE_FILES_ENABLED"]:
-            Path(self.full_name).unlink(missing_ok=True)  # type: ignore
+            self.path.unlink(missing_ok=True)
         db.session.delete(self)
         db.session.commit()
 
 
+class CatalogState(db.Model):  # type: ignore
+    """A single row whose generation goes up with every change to the File table.
+
+    ORM flushes bump it automatically (see bump_on_file_flush); bulk statements
+    do not fire ORM events, so their callers call bump_catalog_generation in the
+    same transaction.
+    """
+
+    __tablename__ = "catalog_state"
+
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    generation: so.Mapped[int] = so.mapped_column(default=0, server_default="0")
+    # The last FileChange sequence a container restart has re-indexed; later
+    # changes mean the index is out of date.
+    indexed_sequence: so.Mapped[int] = so.mapped_column(default=0, server_default="0")
+
+
+def bump_catalog_generation(connection=None):
+    statement = sa.update(CatalogState).values(generation=CatalogState.generation + 1)
+    (connection or db.session).execute(statement)
+
+
+def get_catalog_generation():
+    return db.session.scalar(sa.select(CatalogState.generation)) or 0
+
+
+@sa.event.listens_for(so.Session, "before_flush")
+def bump_on_file_flush(session, flush_context, instances):
+    if any(
+        isinstance(instance, File)
+        for instance in (*session.new, *session.dirty, *session.deleted)
+    ):
+        # On the connection, as session.execute would autoflush mid-flush.
+        bump_catalog_generation(session.connection())
+
+
+class StorageUsage(db.Model):  # type: ignore
+    """Number and total size of the catalogued files, per extension.
+
+    Kept up to date in the same transaction as every File write, so usage
+    stats never have to sum over the File table: ORM flushes adjust it
+    automatically (see adjust_usage_on_file_flush) and bulk statements call
+    adjust_storage_usage.
+    """
+
+    __tablename__ = "storage_usage"
+
+    extension: so.Mapped[str] = so.mapped_column(sa.String(10), primary_key=True)
+    files: so.Mapped[int] = so.mapped_column(default=0, server_default="0")
+    bytes: so.Mapped[int] = so.mapped_column(
+        sa.BigInteger, default=0, server_default="0"
+    )
+
+    def __repr__(self) -> str:
+        return f"<StorageUsage {self.extension} {self.files} {self.bytes}>"
+
+
+def usage_delta(deltas, extension, files, size):
+    """Add files and size (both negative for removals) to deltas[extension]."""
+    delta = deltas.setdefault(extension or "", [0, 0])
+    delta[0] += files
+    delta[1] += size or 0
+
+
+def adjust_storage_usage(deltas, connection=None):
+    """Apply {extension: [files, bytes]} changes to StorageUsage with one upsert."""
+    rows = [
+        {"extension": extension, "files": files, "bytes": size}
+        for extension, (files, size) in deltas.items()
+        if files or size
+    ]
+    if not rows:
+        return
+    statement = sqlite_insert(StorageUsage)
+    (connection or db.session).execute(
+        statement.on_conflict_do_update(
+            index_elements=[StorageUsage.extension],
+            set_={
+                "files": StorageUsage.files + statement.excluded.files,
+                "bytes": StorageUsage.bytes + statement.excluded.bytes,
+            },
+        ),
+        rows,
+    )
+
+
+@sa.event.listens_for(so.Session, "before_flush")
+def adjust_usage_on_file_flush(session, flush_context, instances):
+    # Before the flush, while deleted rows can still be loaded if expired.
+    deltas = {}
+    for instance in session.new:
+        if isinstance(instance, File):
+            usage_delta(deltas, instance.extension, 1, instance.size)
+    for instance in session.deleted:
+        if isinstance(instance, File):
+            usage_delta(deltas, instance.extension, -1, -(instance.size or 0))
+    for instance in session.dirty:
+        if not isinstance(instance, File):
+            continue
+        state = sa.inspect(instance)
+        extension = state.attrs.extension.history
+        size = state.attrs.size.history
+        if not (extension.has_changes() or size.has_changes()):
+            continue
+        old_extension = (
+            extension.deleted[0] if extension.deleted else instance.extension
+        )
+        old_size = size.deleted[0] if size.deleted else instance.size
+        usage_delta(deltas, old_extension, -1, -(old_size or 0))
+        usage_delta(deltas, instance.extension, 1, instance.size)
+    adjust_storage_usage(deltas, session.connection())
+
+
+class FileChange(db.Model):  # type: ignore
+    """Append-only journal of files added, replaced or deleted in the catalog.
+
+    The sequence only ever goes up (AUTOINCREMENT never reuses a number), so
+    an indexer can ask for everything after the last sequence it processed.
+    Like the catalog generation, ORM flushes are journaled automatically (see
+    journal_file_flush) and bulk statements call journal_file_changes in the
+    same transaction.
+    """
+
+    __tablename__ = "file_change"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    ACTIONS = ("add", "replace", "delete")
+
+    sequence: so.Mapped[int] = so.mapped_column(primary_key=True)
+    action: so.Mapped[str] = so.mapped_column(sa.String(8))
+    path: so.Mapped[str] = so.mapped_column(sa.String(1024), index=True)
+    size: so.Mapped[Optional[int]]
+    mtime: so.Mapped[Optional[float]]
+    content_hash: so.Mapped[Optional[str]] = so.mapped_column(sa.String(64))
+    created_at: so.Mapped[datetime] = so.mapped_column(
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+    def __repr__(self) -> str:
+        return f"<FileChange {self.sequence} {self.action} {self.path}>"
+
+    def to_dict(self):
+        return {
+            "sequence": self.sequence,
+            "action": self.action,
+            "path": self.path,
+            "size": self.size,
+            "mtime": self.mtime,
+            "content_hash": self.content_hash,
+            "created_at": self.created_at.replace(tzinfo=timezone.utc).isoformat(),
+        }
+
+
+def journal_file_changes(action, rows, session=None, connection=None):
+    """Journal action for rows of File column values (full_name, size, mtime,
+    content_hash; only full_name is needed for deletes)."""
+    session = session or db.session
+    entries = [
+        {
+            "action": action,
+            "path": row["full_name"],
+            "size": row.get("size"),
+            "mtime": row.get("mtime"),
+            "content_hash": row.get("content_hash"),
+            "created_at": datetime.now(timezone.utc),
+        }
+        for row in rows
+    ]
+    if not entries:
+        return
+    (connection or session).execute(sa.insert(FileChange), entries)
+    # Picked up after the commit, e.g. to append to the change manifest.
+    session.info["file_changes"] = True
+
+
+def file_values(file):
+    return {
+        "full_name": file.full_name,
+        "size": file.size,
+        "mtime": file.mtime,
+        "content_hash": file.content_hash,
+    }
+
+
+@sa.event.listens_for(so.Session, "before_flush")
+def journal_file_flush(session, flush_context, instances):
+    changes = {"add": [], "replace": [], "delete": []}
+    for instance in session.new:
+        if isinstance(instance, File):
+            changes["add"].append(file_values(instance))
+    for instance in session.dirty:
+        if isinstance(instance, File) and session.is_modified(instance):
+            changes["replace"].append(file_values(instance))
+    for instance in session.deleted:
+        if isinstance(instance, File):
+            changes["delete"].append(file_values(instance))
+    for action, rows in changes.items():
+        journal_file_changes(action, rows, session, session.connection())
+
+
+class Job(db.Model):  # type: ignore
+    """A unit of background work, e.g. a container restart, with its progress.
+
+    active_key is only set while the job is queued or running; its unique index
+    is what merges duplicate requests for the same target into one job, even
+    when they arrive at different gunicorn workers.
+    """
+
+    __tablename__ = "job"
+
+    id: so.Mapped[str] = so.mapped_column(sa.String(32), primary_key=True)
+    kind: so.Mapped[str] = so.mapped_column(sa.String(32), index=True)
+    target: so.Mapped[str] = so.mapped_column(sa.String(200), index=True)
+    active_key: so.Mapped[Optional[str]] = so.mapped_column(sa.String(240), unique=True)
+    status: so.Mapped[str] = so.mapped_column(sa.String(16), default="queued")
+    phase: so.Mapped[Optional[str]] = so.mapped_column(sa.String(32))
+    phases: so.Mapped[list] = so.mapped_column(sa.JSON, default=list)
+    result: so.Mapped[Optional[dict]] = so.mapped_column(sa.JSON)
+    error: so.Mapped[Optional[str]] = so.mapped_column(sa.Text)
+    created_at: so.Mapped[datetime] = so.mapped_column(
+        index=True, default=lambda: datetime.now(timezone.utc)
+    )
+    updated_at: so.Mapped[datetime] = so.mapped_column(
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+    ACTIVE_STATUSES = ("queued", "running")
+
+    def __repr__(self) -> str:
+        return f"<Job {self.kind}:{self.target} {self.status}>"
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    def enter_phase(self, phase):
+        now = datetime.now(timezone.utc)
+        phases = [dict(entry) for entry in self.phases or []]
+        if phases and phases[-1].get("finished_at") is None:
+            phases[-1]["finished_at"] = now.isoformat()
+        if phase is not None:
+            phases.append({"phase": phase, "started_at": now.isoformat()})
+        self.phases = phases
+        self.phase = phase
+        self.updated_at = now
+        db.session.commit()
+
+    def finish(self, status, result=None, error=None):
+        self.enter_phase(None)
+        self.status = status
+        self.result = result
+        self.error = error
+        self.active_key = None
+        self.updated_at = datetime.now(timezone.utc)
+        db.session.commit()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "target": self.target,
+            "status": self.status,
+            "phase": self.phase,
+            "phases": [
+                {
+                    **entry,
+                    "seconds": (
+                        (
+                            datetime.fromisoformat(entry["finished_at"])
+                            - datetime.fromisoformat(entry["started_at"])
+                        ).total_seconds()
+                        if entry.get("finished_at")
+                        else None
+                    ),
+                }
+                for entry in self.phases or []
+            ],
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+
 def get_all_files():
     return db.session.execute(sa.select(File).order_by(File.name)).scalars().all()
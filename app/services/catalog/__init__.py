@@ -0,0 +1,3 @@
+from .manage import Catalog, CatalogDiff, file_digest
+
+__all__ = ["Catalog", "CatalogDiff", "file_digest"]
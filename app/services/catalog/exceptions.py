@@ -0,0 +1,6 @@
+class FileAlreadyExists(Exception):
+    pass
+
+
+class DuplicateContent(Exception):
+    pass
@@ -0,0 +1,394 @@
+import hashlib
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import sqlalchemy as sa
+from flask import current_app
+
+from app import db
+from app.models import (
+    File,
+    adjust_storage_usage,
+    bump_catalog_generation,
+    journal_file_changes,
+    usage_delta,
+)
+from app.services.metrics import CATALOG_PHASE_DURATION
+
+from .exceptions import DuplicateContent, FileAlreadyExists
+from .scanner import is_hidden, scan_tree
+
+# Stay well below SQLite's host parameter limit for "IN (...)" clauses.
+BATCH_SIZE = 500
+
+
+def file_digest(path):
+    """Return the hex SHA-256 of a file, read in fixed-size blocks."""
+    try:
+        with open(path, "rb") as file:
+            return hashlib.file_digest(file, "sha256").hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+@dataclass
+class CatalogDiff:
+    added: list = field(default_factory=list)
+    updated: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    # Unchanged files that were never hashed (e.g. catalogued before hashes
+    # existed). Their hashes are filled in without a change journal entry.
+    unhashed: list = field(default_factory=list)
+    # {extension: [files, bytes]} to add to StorageUsage.
+    usage: dict = field(default_factory=dict)
+
+    def __bool__(self):
+        return bool(self.added or self.updated or self.removed)
+
+
+class Catalog:
+    def __init__(
+        self,
+        data_dir,
+        supported_extensions,
+        hash_workers=4,
+        duplicate_policy="reject",
+        scan_workers=8,
+        recursive=True,
+    ) -> None:
+        self.data_dir = Path(data_dir)
+        self.supported_extensions = {
+            f".{extension.removeprefix('.')}" for extension in supported_extensions
+        }
+        self.hash_workers = int(hash_workers)
+        self.duplicate_policy = duplicate_policy
+        self.scan_workers = int(scan_workers)
+        self.recursive = recursive
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            data_dir=current_app.config["DATA_DIR"],
+            supported_extensions=current_app.config["SUPPORTED_FILE_EXTENSIONS"],
+            hash_workers=current_app.config["HASH_WORKERS"],
+            duplicate_policy=current_app.config["DUPLICATE_CONTENT_POLICY"],
+            scan_workers=current_app.config["SCAN_WORKERS"],
+            recursive=current_app.config["SCAN_RECURSIVE"],
+        )
+
+    def scan(self):
+        """Yield (relative path, size, mtime) for every supported file under the
+        data directory, as scan_tree lists it."""
+        return scan_tree(
+            self.data_dir,
+            self.supported_extensions,
+            workers=self.scan_workers,
+            recursive=self.recursive,
+        )
+
+    def scan_names(self, paths):
+        """Like scan(), but only stats the given relative paths."""
+        for path in paths:
+            if not self.in_scope(path):
+                continue
+            try:
+                stats = os.stat(self.data_dir / path)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            if stat.S_ISREG(stats.st_mode):
+                yield path, stats.st_size, stats.st_mtime
+
+    def in_scope(self, path):
+        """True if a relative path is one scan() would report."""
+        parts = path.split("/")
+        return (
+            Path(path).suffix in self.supported_extensions
+            and not os.path.isabs(path)
+            and ".." not in parts
+            and not is_hidden(path)
+            and (self.recursive or len(parts) == 1)
+        )
+
+    @staticmethod
+    def known_files(paths=None):
+        """Return {relative path: (id, size, mtime, content_hash)} for every File
+        row, in a single query.
+
+        When paths is given only those rows are loaded, in batches.
+        """
+        query = sa.select(
+            File.id, File.full_name, File.size, File.mtime, File.content_hash
+        )
+        if paths is None:
+            batches = [db.session.execute(query)]
+        else:
+            paths = list(paths)
+            batches = (
+                db.session.execute(
+                    query.where(File.full_name.in_(paths[start : start + BATCH_SIZE]))
+                )
+                for start in range(0, len(paths), BATCH_SIZE)
+            )
+        return {
+            path: (id, size, mtime, content_hash)
+            for rows in batches
+            for id, path, size, mtime, content_hash in rows
+        }
+
+    def diff(self, known, on_disk):
+        """Compare DB rows with the directory listing.
+
+        on_disk is consumed as it is produced, e.g. straight from scan(), so the
+        listing is never held in memory; known (from known_files) is emptied
+        along the way and whatever is left in it was removed from disk.
+
+        Only files whose size or mtime changed end up in added/updated, which is
+        what keeps re-syncing a large directory cheap; unchanged files without a
+        hash go to unhashed.
+        """
+        result = CatalogDiff()
+        for path, size, mtime in on_disk:
+            existing = known.pop(path, None)
+            extension = Path(path).suffix
+            if existing is None:
+                usage_delta(result.usage, extension, 1, size)
+                result.added.append(
+                    {
+                        "name": Path(path).name,
+                        "full_name": path,
+                        "extension": extension,
+                        "size": size,
+                        "mtime": mtime,
+                    }
+                )
+            elif (existing[1], existing[2]) != (size, mtime):
+                usage_delta(result.usage, extension, 0, size - (existing[1] or 0))
+                result.updated.append(
+                    {"id": existing[0], "full_name": path, "size": size, "mtime": mtime}
+                )
+            elif existing[3] is None:
+                result.unhashed.append({"id": existing[0], "full_name": path})
+        for path, file in known.items():
+            result.removed.append((file[0], path))
+            usage_delta(result.usage, Path(path).suffix, -1, -(file[1] or 0))
+        return result
+
+    def hash_files(self, rows, content_hashes=None):
+        """Fill in "content_hash" on diff rows, hashing files in a thread pool.
+
+        Hashes already known to the caller (e.g. computed while uploading) are
+        used as-is.
+        """
+        content_hashes = content_hashes or {}
+        to_hash = [row for row in rows if row["full_name"] not in content_hashes]
+        if to_hash:
+            with ThreadPoolExecutor(max_workers=self.hash_workers) as executor:
+                digests = executor.map(
+                    file_digest, (self.data_dir / row["full_name"] for row in to_hash)
+                )
+                for row, digest in zip(to_hash, digests):
+                    content_hashes[row["full_name"]] = digest
+        for row in rows:
+            row["content_hash"] = content_hashes[row["full_name"]]
+
+    def log_duplicates(self, rows):
+        hashes = {row["content_hash"] for row in rows if row["content_hash"]}
+        if not hashes:
+            return
+        hashes = list(hashes)
+        counts = {}
+        for start in range(0, len(hashes), BATCH_SIZE):
+            counts.update(
+                db.session.execute(
+                    sa.select(
+                        File.content_hash, sa.func.group_concat(File.full_name, ", ")
+                    )
+                    .where(File.content_hash.in_(hashes[start : start + BATCH_SIZE]))
+                    .group_by(File.content_hash)
+                    .having(sa.func.count(File.id) > 1)
+                ).all()
+            )
+        for names in counts.values():
+            current_app.logger.warning(f"Files with identical content: {names}")
+
+    def find_duplicate(self, content_hash):
+        return db.session.scalar(
+            sa.select(File).where(File.content_hash == content_hash).limit(1)
+        )
+
+    def add_file(self, source, filename, content_hash):
+        """Move a verified upload from source into DATA_DIR and register it.
+
+        If a file with the same content is already in the catalog the upload is
+        rejected, or with DUPLICATE_CONTENT_POLICY=link stored as a hard link
+        to the existing file so the content is only kept on disk once.
+        """
+        source = Path(source)
+        target = self.data_dir / filename
+        duplicate = None
+        if self.duplicate_policy != "allow":
+            duplicate = self.find_duplicate(content_hash)
+
+        if duplicate is None:
+            try:
+                self.link(source, target, rename_fallback=True)
+            finally:
+                source.unlink(missing_ok=True)
+        else:
+            source.unlink(missing_ok=True)
+            if self.duplicate_policy != "link":
+                raise DuplicateContent(
+                    f"File '{filename}' has the same content as existing file '{duplicate.full_name}'."
+                )
+            self.link(self.data_dir / duplicate.full_name, target)  # type: ignore
+        self.sync_names([filename], content_hashes={filename: content_hash})
+        return target
+
+    @staticmethod
+    def link(source, target, rename_fallback=False):
+        """Hard link source to target, failing rather than overwriting a file
+        that appeared in the meantime."""
+        try:
+            os.link(source, target)
+        except FileExistsError:
+            raise FileAlreadyExists(
+                f"File '{target.name}' already exists in directory. Please delete the existing file if you want to replace it."
+            )
+        except OSError:
+            # Filesystem without hard links.
+            if not rename_fallback or target.exists():
+                raise FileAlreadyExists(f"File '{target.name}' could not be stored.")
+            os.replace(source, target)
+
+    def remove_files(self, ids):
+        """Delete the File rows with the given ids in one transaction.
+
+        Returns (relative path, absolute path) for every row that was removed;
+        unlinking the files is up to the caller.
+        """
+        ids = list(ids)
+        removed = []
+        try:
+            for start in range(0, len(ids), BATCH_SIZE):
+                batch = ids[start : start + BATCH_SIZE]
+                removed.extend(
+                    db.session.execute(
+                        sa.select(File.full_name, File.extension, File.size).where(
+                            File.id.in_(batch)
+                        )
+                    ).all()
+                )
+                db.session.execute(
+                    sa.delete(File)
+                    .where(File.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+            if removed:
+                journal_file_changes(
+                    "delete", [{"full_name": path} for path, _, _ in removed]
+                )
+                usage = {}
+                for _, extension, size in removed:
+                    usage_delta(usage, extension, -1, -(size or 0))
+                adjust_storage_usage(usage)
+                bump_catalog_generation()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return [(path, str(self.data_dir / path)) for path, _, _ in removed]
+
+    def apply(self, changes):
+        """Write a diff to the DB as bulk statements inside one transaction,
+        together with its change journal entries and storage usage."""
+        try:
+            if changes.added:
+                db.session.execute(sa.insert(File), changes.added)
+                journal_file_changes("add", changes.added)
+            if changes.updated:
+                db.session.execute(sa.update(File), changes.updated)
+                journal_file_changes("replace", changes.updated)
+            removed_ids = [id for id, _ in changes.removed]
+            for start in range(0, len(removed_ids), BATCH_SIZE):
+                batch = removed_ids[start : start + BATCH_SIZE]
+                db.session.execute(
+                    sa.delete(File)
+                    .where(File.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+            journal_file_changes(
+                "delete", [{"full_name": path} for _, path in changes.removed]
+            )
+            adjust_storage_usage(changes.usage)
+            if changes:
+                bump_catalog_generation()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def backfill_hashes(self, rows):
+        """Hash files whose content is unchanged but was never hashed.
+
+        Only content_hash is written: no change journal entry and no catalog
+        generation bump, since nothing a client sees has changed.
+        """
+        with CATALOG_PHASE_DURATION.time(phase="hash"):
+            self.hash_files(rows)
+        rows = [
+            {"id": row["id"], "content_hash": row["content_hash"]}
+            for row in rows
+            if row["content_hash"]
+        ]
+        if not rows:
+            return
+        try:
+            with CATALOG_PHASE_DURATION.time(phase="write"):
+                db.session.execute(sa.update(File), rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self.log_duplicates(rows)
+        current_app.logger.info(f"Backfilled content hashes of {len(rows)} file(s)")
+
+    def sync(self):
+        # The directory is diffed while it is being listed, so both count
+        # towards the scan phase.
+        with CATALOG_PHASE_DURATION.time(phase="scan"):
+            changes = self.diff(self.known_files(), self.scan())
+        return self.apply_diff(changes)
+
+    def sync_names(self, paths, content_hashes=None):
+        """Sync only the given relative paths, e.g. the ones reported by the watcher."""
+        paths = {path for path in paths if self.in_scope(path)}
+        if not paths:
+            return CatalogDiff()
+        with CATALOG_PHASE_DURATION.time(phase="scan"):
+            changes = self.diff(self.known_files(paths), self.scan_names(paths))
+        return self.apply_diff(changes, content_hashes)
+
+    def apply_diff(self, changes, content_hashes=None):
+        if changes:
+            with CATALOG_PHASE_DURATION.time(phase="hash"):
+                self.hash_files(changes.added + changes.updated, content_hashes)
+            for file in changes.added:
+                current_app.logger.debug(
+                    f"Creating DB entry for file '{file['full_name']}'"
+                )
+            for _, path in changes.removed:
+                current_app.logger.debug(
+                    f"Removing file '{path}' from DB as it is no longer in the directory"
+                )
+            with CATALOG_PHASE_DURATION.time(phase="write"):
+                self.apply(changes)
+            self.log_duplicates(changes.added + changes.updated)
+            current_app.logger.info(
+                f"Catalog synced: {len(changes.added)} added, {len(changes.updated)} updated, {len(changes.removed)} removed"
+            )
+        if changes.unhashed:
+            self.backfill_hashes(changes.unhashed)
+        return changes
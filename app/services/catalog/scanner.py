@@ -0,0 +1,70 @@
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def is_hidden(relative_path):
+    """True for paths inside a dot directory (e.g. the .uploads staging area)."""
+    return any(part.startswith(".") for part in relative_path.split("/")[:-1])
+
+
+def scan_directory(root, relative, extensions):
+    """List one directory with os.scandir.
+
+    Returns ([(relative path, size, mtime)], [relative subdirectory paths]).
+    Directories starting with a dot and symlinked directories are skipped; a
+    directory that disappeared while the tree was being walked is empty.
+    """
+    files = []
+    directories = []
+    try:
+        with os.scandir(os.path.join(root, relative)) as entries:
+            for entry in entries:
+                path = f"{relative}/{entry.name}" if relative else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith("."):
+                            directories.append(path)
+                    elif (
+                        os.path.splitext(entry.name)[1] in extensions
+                        and entry.is_file()
+                    ):
+                        # One stat per file; on Windows scandir already has it.
+                        stats = entry.stat()
+                        files.append((path, stats.st_size, stats.st_mtime))
+                except FileNotFoundError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return files, directories
+
+
+def scan_tree(root, extensions, workers=8, recursive=True):
+    """Yield (relative path, size, mtime) for every file in root with one of the
+    given extensions.
+
+    Subdirectories are listed concurrently, at most workers at a time, which
+    hides most of the per-directory latency of network mounts. Results are
+    yielded as each directory finishes, so memory is bounded by the directories
+    in flight rather than by the size of the tree. Paths use "/" separators.
+
+    Errors other than a directory vanishing mid-scan (e.g. permission denied)
+    are raised: a partial listing would otherwise look like deleted files.
+    """
+    root = os.fspath(root)
+    extensions = frozenset(extensions)
+    workers = max(int(workers), 1)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as executor:
+        pending = {executor.submit(scan_directory, root, "", extensions)}
+        queued = deque()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, directories = future.result()
+                if recursive:
+                    queued.extend(directories)
+                yield from files
+            while queued and len(pending) < workers:
+                pending.add(
+                    executor.submit(scan_directory, root, queued.popleft(), extensions)
+                )
@@ -1,3 +1,10 @@
+from .events import ContainerEventSubscriber, start_event_subscriber
 from .manage import Container
+from .snapshot import snapshots
 
-__all__ = ["Container"]
+__all__ = [
+    "Container",
+    "ContainerEventSubscriber",
+    "snapshots",
+    "start_event_subscriber",
+]
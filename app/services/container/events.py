@@ -0,0 +1,89 @@
+import threading
+import time
+
+from .snapshot import SnapshotCache, get_client, snapshots
+
+ERROR_BACKOFF_SECONDS = 5
+STATE_EVENTS = ["start", "die", "restart", "stop", "kill", "pause", "unpause", "oom"]
+
+
+class ContainerEventSubscriber:
+    """Keeps the container snapshot current from the Docker /events stream.
+
+    The snapshot is refreshed only when a state event for the container arrives,
+    plus a full reconcile every reconcile_seconds as a safety net. While the
+    subscription is up, reads of the snapshot make no Docker calls at all; if it
+    drops, the cache falls back to its TTL until the subscriber reconnects.
+    """
+
+    def __init__(self, app, name, cache: SnapshotCache = snapshots) -> None:
+        self.app = app
+        self.name = name
+        self.cache = cache
+        self.reconcile_seconds = float(app.config["CONTAINER_RECONCILE_SECONDS"])
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name="pai-admin-container-events", daemon=True
+        )
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    def reconcile(self):
+        self.cache.put(self.cache.fetch(self.name))
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.subscribe()
+            except Exception as error:
+                self.cache.unsubscribe(self.name)
+                self.app.logger.warning(
+                    f"Docker events subscription for container '{self.name}' failed: {error}"
+                )
+                self.stop_event.wait(ERROR_BACKOFF_SECONDS)
+
+    def subscribe(self):
+        client = get_client()
+        since = int(time.time())
+        self.reconcile()
+        self.cache.subscribe(self.name)
+        while not self.stop_event.is_set():
+            # The stream closes by itself at "until", which is when the periodic
+            # reconcile runs; the next subscription picks up from there.
+            until = since + int(self.reconcile_seconds)
+            events = client.events(
+                since=since,
+                until=until,
+                decode=True,
+                filters={
+                    "type": "container",
+                    "container": self.name,
+                    "event": STATE_EVENTS,
+                },
+            )
+            for event in events:
+                self.app.logger.info(
+                    f"Container '{self.name}' event: {event.get('Action', event.get('status'))}"
+                )
+                self.reconcile()
+                if self.stop_event.is_set():
+                    break
+            self.reconcile()
+            since = until
+
+
+def start_event_subscriber(app):
+    """Start one subscriber per managed container."""
+    from app.services.fleet import managed_containers
+
+    if not app.config["CONTAINER_EVENTS_ENABLED"]:
+        return []
+    return [
+        ContainerEventSubscriber(app, managed.name).start()
+        for managed in managed_containers(app.config)
+    ]
@@ -1,40 +1,48 @@
 from datetime import datetime, timezone
 
 import arrow
-import docker
+
+from app.services.metrics import DOCKER_CALL_DURATION
 
 from .exceptions import InsufficientUptime, NotRunning
+from .snapshot import get_client, snapshots
 
 
 class Container:
-    def __init__(self, name) -> None:
+    def __init__(self, name, cache_ttl=5) -> None:
         self.name = name
-        self.client = docker.from_env()
+        self.cache_ttl = float(cache_ttl)
+
+    @property
+    def client(self):
+        return get_client()
+
+    @property
+    def snapshot(self):
+        return snapshots.get(self.name, self.cache_ttl)
 
     @property
     def container(self):
-        container = self.client.containers.get(self.name)
-        container.reload()
-        return container
+        return self.client.containers.get(self.name)
 
     @property
     def status(self):
-        try:
-            return self.container.status.capitalize()
-        except Exception:
+        snapshot = self.snapshot
+        if not snapshot.known:
             return "Unknown"
+        return snapshot.status.capitalize()
 
     @property
     def state(self):
-        return self.client.api.inspect_container(self.container.id)["State"]
+        return self.snapshot.state
 
     @property
     def start_time(self):
-        return datetime.fromisoformat(self.state["StartedAt"])
+        return self.snapshot.started_at
 
     @property
     def is_running(self):
-        return self.state["Running"]
+        return self.snapshot.running
 
     @property
     def uptime(self):
@@ -65,15 +73,30 @@ class Container:
         except Exception:
             return False
 
-    def restart(self, must_be_up_for_seconds=300):
-        if self.is_running:
-            if not self.is_restartable(must_be_up_for_seconds):
-                raise InsufficientUptime(
-                    f"Container {self.name}|{self.container.short_id} has not been running for {must_be_up_for_seconds} second(s)."
-                )
-            else:
-                self.container.restart()
-        else:
+    def stop(self):
+        with DOCKER_CALL_DURATION.time(operation="stop"):
+            self.container.stop()
+        snapshots.invalidate(self.name)
+
+    def start(self):
+        with DOCKER_CALL_DURATION.time(operation="start"):
+            self.container.start()
+        snapshots.invalidate(self.name)
+
+    def check_restartable(self, must_be_up_for_seconds=300):
+        """Raise NotRunning or InsufficientUptime unless is_restartable."""
+        snapshot = self.snapshot
+        if not snapshot.running:
             raise NotRunning(
-                f"Container {self.name}|{self.container.short_id} is not running."
+                f"Container {self.name}|{snapshot.short_id} is not running."
             )
+        if not self.is_restartable(must_be_up_for_seconds):
+            raise InsufficientUptime(
+                f"Container {self.name}|{snapshot.short_id} has not been running for {must_be_up_for_seconds} second(s)."
+            )
+
+    def restart(self, must_be_up_for_seconds=300):
+        self.check_restartable(must_be_up_for_seconds)
+        with DOCKER_CALL_DURATION.time(operation="restart"):
+            self.container.restart()
+        snapshots.invalidate(self.name)
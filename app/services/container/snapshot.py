@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+import docker
+
+from app.services.metrics import DOCKER_CALL_DURATION
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the Docker client of this process, creating it on first use.
+
+    The client is recreated after a fork so gunicorn workers never share the
+    connection pool of the master process.
+    """
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = docker.from_env()
+            _client_pid = os.getpid()
+        return _client
+
+
+@dataclass(frozen=True)
+class ContainerSnapshot:
+    name: str
+    id: Optional[str] = None
+    status: str = "unknown"
+    running: bool = False
+    started_at: Optional[datetime] = None
+    restart_count: int = 0
+    state: dict = field(default_factory=dict)
+    fetched_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_inspect(cls, name, data):
+        state = data["State"]
+        return cls(
+            name=name,
+            id=data["Id"],
+            status=state["Status"],
+            running=state["Running"],
+            started_at=datetime.fromisoformat(state["StartedAt"]),
+            restart_count=data.get("RestartCount", 0),
+            state=state,
+        )
+
+    @property
+    def short_id(self):
+        return self.id[:12] if self.id else "unknown"
+
+    @property
+    def known(self):
+        return self.id is not None
+
+    @property
+    def fingerprint(self):
+        """Identifies the container state shown in the UI, for ETags."""
+        started_at = self.started_at.isoformat() if self.started_at else None
+        return (
+            f"{self.id}:{self.status}:{self.running}:{started_at}:{self.restart_count}"
+        )
+
+
+class SnapshotCache:
+    """Per-process cache of container inspect data with a time to live.
+
+    Concurrent requests for the same container wait for a single inspect call
+    instead of each making their own. Failed lookups are cached as "unknown"
+    snapshots for the same TTL, so an unreachable daemon is not hammered either.
+    Containers with a live events subscription never expire; the subscriber
+    puts fresh snapshots in as the container changes state.
+
+    Every change of a cached snapshot bumps the generation, and wait() lets
+    the container event streams sleep until that happens.
+    """
+
+    def __init__(self) -> None:
+        self._snapshots = {}
+        self._locks = {}
+        self._subscribed = set()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._generation = 0
+
+    def _name_lock(self, name):
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def is_fresh(self, name, snapshot, ttl):
+        if snapshot is None:
+            return False
+        if name in self._subscribed:
+            return True
+        return time.monotonic() - snapshot.fetched_at < ttl
+
+    def get(self, name, ttl):
+        snapshot = self._snapshots.get(name)
+        if self.is_fresh(name, snapshot, ttl):
+            return snapshot
+        with self._name_lock(name):
+            snapshot = self._snapshots.get(name)
+            if self.is_fresh(name, snapshot, ttl):
+                return snapshot
+            snapshot = self.fetch(name)
+            self.put(snapshot)
+            return snapshot
+
+    @staticmethod
+    def fetch(name):
+        try:
+            with DOCKER_CALL_DURATION.time(operation="inspect"):
+                data = get_client().api.inspect_container(name)
+            return ContainerSnapshot.from_inspect(name, data)
+        except Exception:
+            return ContainerSnapshot(name=name)
+
+    def put(self, snapshot):
+        previous = self._snapshots.get(snapshot.name)
+        self._snapshots[snapshot.name] = snapshot
+        if previous is None or previous.fingerprint != snapshot.fingerprint:
+            self.notify()
+
+    def invalidate(self, name):
+        if self._snapshots.pop(name, None) is not None:
+            self.notify()
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def notify(self):
+        with self._changed:
+            self._generation += 1
+            self._changed.notify_all()
+
+    def wait(self, generation, timeout):
+        """Block until the generation moves on from generation, or for at most
+        timeout seconds. Returns the current generation."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._generation != generation, timeout)
+            return self._generation
+
+    def subscribe(self, name):
+        self._subscribed.add(name)
+
+    def unsubscribe(self, name):
+        self._subscribed.discard(name)
+
+
+snapshots = SnapshotCache()
@@ -0,0 +1,15 @@
+from .manage import (
+    Fleet,
+    ManagedContainer,
+    get_managed_container,
+    load_managed_containers,
+    managed_containers,
+)
+
+__all__ = [
+    "Fleet",
+    "ManagedContainer",
+    "get_managed_container",
+    "load_managed_containers",
+    "managed_containers",
+]
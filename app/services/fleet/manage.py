@@ -0,0 +1,224 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, fields
+from typing import Optional
+
+from app.services.container import Container
+from app.services.index import IndexFile
+
+# The lookup currently running for each container name, shared by all overviews
+# in this process; see Fleet.overview.
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ManagedContainer:
+    name: str
+    index_running_file: str
+    index_complete_file: str
+    data_dir: Optional[str] = None
+
+    def container(self, cache_ttl=5):
+        return Container(name=self.name, cache_ttl=cache_ttl)
+
+    def index(self):
+        return IndexFile(
+            running_file_path=self.index_running_file,
+            complete_file_path=self.index_complete_file,
+        )
+
+
+def parse_managed_container(entry):
+    """Return the ManagedContainer for one MANAGED_CONTAINERS entry.
+
+    Raises ValueError if the entry is not an object, has unknown fields or is
+    missing one of the required paths.
+    """
+    if not isinstance(entry, dict):
+        raise ValueError("entry must be a JSON object")
+    unknown = set(entry) - {field.name for field in fields(ManagedContainer)}
+    if unknown:
+        raise ValueError(f"unknown field(s): {', '.join(sorted(unknown))}")
+    for key in ("name", "index_running_file", "index_complete_file"):
+        if not isinstance(entry.get(key), str) or not entry[key]:
+            raise ValueError(f"'{key}' must be a non-empty string")
+    if not isinstance(entry.get("data_dir", ""), (str, type(None))):
+        raise ValueError("'data_dir' must be a string")
+    return ManagedContainer(**entry)
+
+
+def load_managed_containers(config):
+    """The containers this pai-admin manages, and the configuration errors.
+
+    MANAGED_CONTAINERS is a JSON list of {"name", "index_running_file",
+    "index_complete_file", "data_dir"} objects. Without it the single container
+    from CONTAINER_NAME, INDEX_RUNNING_FILE, INDEX_COMPLETE_FILE and DATA_DIR is
+    managed, as before.
+
+    data_dir only tells which container indexes DATA_DIR, whose restarts also
+    re-index the catalog (see catalog_container). The files pages always work
+    on DATA_DIR; the data directories of the other containers are shown on the
+    fleet page but their files cannot be managed from here.
+
+    Returns (containers, errors); errors is a list of (label, message) for the
+    entries that could not be used, labelled by name where they have one.
+    """
+    configured = config["MANAGED_CONTAINERS"]
+    if isinstance(configured, str):
+        try:
+            configured = json.loads(configured) if configured.strip() else []
+        except ValueError as e:
+            return [], [("MANAGED_CONTAINERS", f"invalid JSON: {e}")]
+    if not configured:
+        if not config["CONTAINER_NAME"]:
+            return [], []
+        return [
+            ManagedContainer(
+                name=config["CONTAINER_NAME"],
+                index_running_file=config["INDEX_RUNNING_FILE"],
+                index_complete_file=config["INDEX_COMPLETE_FILE"],
+                data_dir=config["DATA_DIR"],
+            )
+        ], []
+    if not isinstance(configured, list):
+        return [], [("MANAGED_CONTAINERS", "must be a JSON list")]
+    containers = []
+    errors = []
+    for position, entry in enumerate(configured):
+        try:
+            containers.append(parse_managed_container(entry))
+        except ValueError as e:
+            name = entry.get("name") if isinstance(entry, dict) else None
+            if not isinstance(name, str) or not name:
+                name = f"MANAGED_CONTAINERS[{position}]"
+            errors.append((name, str(e)))
+    return containers, errors
+
+
+def managed_containers(config):
+    """The valid entries of load_managed_containers."""
+    return load_managed_containers(config)[0]
+
+
+def get_managed_container(config, name=None):
+    """Return the managed container called name, or the first one if name is empty."""
+    containers = managed_containers(config)
+    if not name:
+        return containers[0] if containers else None
+    for managed in containers:
+        if managed.name == name:
+            return managed
+    return None
+
+
+class Fleet:
+    """Gathers the state of all managed containers concurrently.
+
+    Each overview starts its own pool of at most FLEET_MAX_WORKERS threads and
+    waits at most timeout seconds; containers whose lookup has not finished by
+    then are reported as timed out, so a hung Docker daemon or a slow mount
+    cannot stall the whole page. A lookup that is still running from an
+    earlier overview is waited on again rather than started a second time, so
+    a hung container ties up at most one thread.
+    """
+
+    def __init__(self, config) -> None:
+        self.containers, self.errors = load_managed_containers(config)
+        self.cache_ttl = config["CONTAINER_CACHE_TTL_SECONDS"]
+        self.container_minimum_uptime = config["MINIMUM_CONTAINER_UPTIME_SECONDS"]
+        self.index_minimum_uptime = config["MINIMUM_INDEX_UPTIME_SECONDS"]
+        self.timeout = float(config["FLEET_TIMEOUT_SECONDS"])
+        self.max_workers = int(config["FLEET_MAX_WORKERS"])
+
+    def status(self, managed):
+        container = managed.container(self.cache_ttl)
+        index = managed.index()
+        if index.is_running():
+            index_status = f"Running ({index.running_status()[1]})"
+        elif index.is_complete():
+            index_status = f"Complete ({index.complete_status()[1]})"
+        else:
+            index_status = "Unknown"
+        return {
+            "name": managed.name,
+            "data_dir": managed.data_dir,
+            "status": container.status,
+            "uptime": container.uptime[1],
+            "index_status": index_status,
+            "restartable": container.is_restartable(self.container_minimum_uptime)
+            and index.is_restartable(self.index_minimum_uptime),
+            "timed_out": False,
+            "error": None,
+        }
+
+    def timed_out(self, managed):
+        return {
+            "name": managed.name,
+            "data_dir": managed.data_dir,
+            "status": "Timed out",
+            "uptime": "Unknown",
+            "index_status": "Unknown",
+            "restartable": False,
+            "timed_out": True,
+            "error": None,
+        }
+
+    def errored(self, name, data_dir, status, message):
+        return {
+            "name": name,
+            "data_dir": data_dir,
+            "status": status,
+            "uptime": "Unknown",
+            "index_status": "Unknown",
+            "restartable": False,
+            "timed_out": False,
+            "error": message,
+        }
+
+    def submit(self):
+        """Return {managed: future}, starting lookups only for containers that
+        have none running."""
+        futures = {}
+        with _in_flight_lock:
+            to_start = []
+            for managed in self.containers:
+                future = _in_flight.get(managed.name)
+                if future is None or future.done():
+                    to_start.append(managed)
+                else:
+                    futures[managed] = future
+            if to_start:
+                executor = ThreadPoolExecutor(
+                    max_workers=max(min(self.max_workers, len(to_start)), 1),
+                    thread_name_prefix="pai-admin-fleet",
+                )
+                for managed in to_start:
+                    futures[managed] = _in_flight[managed.name] = executor.submit(
+                        self.status, managed
+                    )
+                # Lets the threads exit once their lookups return, without
+                # waiting for them here.
+                executor.shutdown(wait=False)
+        return futures
+
+    def overview(self):
+        futures = self.submit()
+        wait(futures.values(), timeout=self.timeout)
+        results = []
+        for managed in self.containers:
+            future = futures[managed]
+            if not future.done():
+                results.append(self.timed_out(managed))
+            elif future.exception() is not None:
+                results.append(
+                    self.errored(
+                        managed.name, managed.data_dir, "Error", str(future.exception())
+                    )
+                )
+            else:
+                results.append(future.result())
+        for name, message in self.errors:
+            results.append(self.errored(name, None, "Misconfigured", message))
+        return results
@@ -28,6 +28,17 @@ class IndexFile:
     def complete_status(self):
         return self.index_flag_status(self.complete_file)
 
+    @property
+    def fingerprint(self):
+        """Identifies the state of both flag files, for ETags."""
+        parts = []
+        for file in (self.running_file, self.complete_file):
+            try:
+                parts.append(str(file.stat().st_ctime_ns))
+            except FileNotFoundError:
+                parts.append("-")
+        return ":".join(parts)
+
     def is_running(self):
         return self.running_file.exists()
 
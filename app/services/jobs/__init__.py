@@ -0,0 +1,15 @@
+from .delete import DELETE_JOB, delete_files
+from .manage import JobRunner, get_job, jobs, latest_job, latest_job_state
+from .restart import RESTART_JOB, restart_container
+
+__all__ = [
+    "DELETE_JOB",
+    "JobRunner",
+    "RESTART_JOB",
+    "delete_files",
+    "get_job",
+    "jobs",
+    "latest_job",
+    "latest_job_state",
+    "restart_container",
+]
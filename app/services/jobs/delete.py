@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.services.catalog import Catalog
+
+DELETE_JOB = "delete"
+
+
+def unlink(path):
+    try:
+        Path(path).unlink(missing_ok=True)
+    except OSError as error:
+        return error.strerror or str(error)
+    return None
+
+
+def delete_files(job, files, workers):
+    """Unlink files whose File rows were already removed, on a thread pool.
+
+    files is a list of (relative path, absolute path). Files that could not be
+    unlinked are synced back into the catalog, so the table keeps matching the
+    directory.
+    """
+    job.enter_phase("unlinking")
+    with ThreadPoolExecutor(max_workers=int(workers)) as executor:
+        errors = list(executor.map(unlink, (path for _, path in files)))
+
+    deleted = [name for (name, _), error in zip(files, errors) if error is None]
+    failed = [
+        {"name": name, "error": error}
+        for (name, _), error in zip(files, errors)
+        if error is not None
+    ]
+    if failed:
+        Catalog.from_config().sync_names(entry["name"] for entry in failed)
+    return {"deleted": deleted, "failed": failed}
@@ -0,0 +1,2 @@
+class JobTimeout(Exception):
+    pass
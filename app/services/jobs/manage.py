@@ -0,0 +1,133 @@
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+from flask import current_app
+
+from app import db
+from app.models import Job
+
+
+def get_job(job_id):
+    return db.session.get(Job, job_id)
+
+
+def latest_job(kind, target):
+    return db.session.scalar(
+        sa.select(Job)
+        .where(Job.kind == kind, Job.target == target)
+        .order_by(Job.created_at.desc())
+        .limit(1)
+    )
+
+
+def latest_job_state(kind, target):
+    """The id, status, phase and updated_at of the latest job, without loading
+    the job itself; cheap enough to check for progress every second."""
+    return db.session.execute(
+        sa.select(Job.id, Job.status, Job.phase, Job.updated_at)
+        .where(Job.kind == kind, Job.target == target)
+        .order_by(Job.created_at.desc())
+        .limit(1)
+    ).first()
+
+
+class JobRunner:
+    """Runs jobs on a small thread pool in the worker that submitted them.
+
+    Progress is written to the Job table, so any worker can report on a job.
+    A job whose worker died is recognised by not having been updated for
+    JOB_STALE_SECONDS and is marked failed the next time the target is used.
+    """
+
+    def __init__(self) -> None:
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=int(current_app.config["JOB_WORKERS"]),
+                    thread_name_prefix="pai-admin-job",
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    @staticmethod
+    def expire_stale(active_key):
+        cutoff = datetime.now(timezone.utc) - timedelta(
+            seconds=int(current_app.config["JOB_STALE_SECONDS"])
+        )
+        db.session.execute(
+            sa.update(Job)
+            .where(Job.active_key == active_key, Job.updated_at < cutoff)
+            .values(
+                status="failed",
+                active_key=None,
+                error="Job stopped reporting progress.",
+            )
+        )
+        db.session.commit()
+
+    def submit(self, kind, target, func, *args, merge=True):
+        """Start func(job, *args) in the background, unless a job of the same kind
+        is already in flight for target. Returns (job, created).
+
+        With merge=False the job always runs on its own.
+        """
+        active_key = f"{kind}:{target}" if merge else None
+        if active_key is not None:
+            self.expire_stale(active_key)
+            existing = db.session.scalar(
+                sa.select(Job).where(Job.active_key == active_key)
+            )
+            if existing is not None:
+                return existing, False
+
+        job = Job(
+            id=secrets.token_hex(16),
+            kind=kind,
+            target=target,
+            active_key=active_key,
+            status="queued",
+            phases=[],
+        )
+        db.session.add(job)
+        try:
+            db.session.commit()
+        except sa.exc.IntegrityError:
+            # Another worker submitted the same job in the meantime.
+            db.session.rollback()
+            existing = db.session.scalar(
+                sa.select(Job).where(Job.active_key == active_key)
+            )
+            return existing, False
+
+        app = current_app._get_current_object()  # type: ignore
+        self.executor.submit(self.run, app, job.id, func, args)
+        return job, True
+
+    @staticmethod
+    def run(app, job_id, func, args):
+        with app.app_context():
+            job = db.session.get(Job, job_id)
+            job.status = "running"
+            db.session.commit()
+            try:
+                result = func(job, *args)
+            except Exception as error:
+                app.logger.exception(f"Job {job.kind}:{job.target} failed")
+                db.session.rollback()
+                job.finish("failed", error=str(error))
+            else:
+                job.finish("succeeded", result=result)
+                app.logger.info(f"Job {job.kind}:{job.target} succeeded")
+
+
+jobs = JobRunner()
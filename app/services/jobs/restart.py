@@ -0,0 +1,55 @@
+import time
+
+from app.services.container.exceptions import InsufficientUptime
+
+from .exceptions import JobTimeout
+
+RESTART_JOB = "restart"
+
+
+def wait_for(condition, timeout, poll_seconds, description):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            raise JobTimeout(f"Timed out after {timeout} second(s) {description}.")
+        time.sleep(poll_seconds)
+
+
+def restart_container(job, container, index, settings):
+    """Restart a PAI container and follow it until its index is complete.
+
+    The uptime checks are repeated here because the job may have been queued
+    behind another restart since the view or scheduler checked them.
+
+    Phases: restarting (Container.restart), waiting_for_index
+    (INDEX_RUNNING_FILE to appear), indexing (INDEX_COMPLETE_FILE to appear).
+    """
+    poll_seconds = float(settings["RESTART_POLL_SECONDS"])
+    container_minimum_uptime = settings["MINIMUM_CONTAINER_UPTIME_SECONDS"]
+    index_minimum_uptime = settings["MINIMUM_INDEX_UPTIME_SECONDS"]
+    if not index.is_restartable(index_minimum_uptime):
+        raise InsufficientUptime(
+            f"Index of container {container.name} has not been complete for {index_minimum_uptime} second(s)."
+        )
+    container.check_restartable(container_minimum_uptime)
+    index.delete_index_complete_flag()
+
+    job.enter_phase("restarting")
+    container.restart(container_minimum_uptime)
+
+    job.enter_phase("waiting_for_index")
+    wait_for(
+        lambda: index.is_running() or index.is_complete(),
+        float(settings["RESTART_INDEX_START_TIMEOUT_SECONDS"]),
+        poll_seconds,
+        "waiting for the index to start",
+    )
+
+    job.enter_phase("indexing")
+    wait_for(
+        index.is_complete,
+        float(settings["RESTART_INDEX_COMPLETE_TIMEOUT_SECONDS"]),
+        poll_seconds,
+        "waiting for the index to complete",
+    )
+    return {"container": container.name}
@@ -0,0 +1,3 @@
+from .manage import ChangeJournal, init_app
+
+__all__ = ["ChangeJournal", "init_app"]
@@ -0,0 +1,140 @@
+import fcntl
+import json
+import os
+
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import current_app, has_app_context
+
+from app import db
+from app.models import FileChange
+
+# How far back from the end of the manifest to look for its last line at a time.
+TAIL_BLOCK_SIZE = 8 * 1024
+MANIFEST_BATCH_SIZE = 1000
+
+
+def read_last_line(manifest):
+    """Return the last complete line of a file opened in "a+b" mode.
+
+    A partial line left behind by a crash mid-append is truncated, so the next
+    append starts on a line of its own.
+    """
+    position = manifest.seek(0, os.SEEK_END)
+    tail = b""
+    while position > 0 and tail.count(b"\n") < 2:
+        step = min(TAIL_BLOCK_SIZE, position)
+        position -= step
+        manifest.seek(position)
+        tail = manifest.read(step) + tail
+    if tail and not tail.endswith(b"\n"):
+        complete = tail.rfind(b"\n") + 1
+        manifest.truncate(position + complete)
+        tail = tail[:complete]
+    return tail.rstrip(b"\n").rsplit(b"\n", 1)[-1]
+
+
+class ChangeJournal:
+    """Reads the File change journal for incremental indexing.
+
+    Every change is available from the /changes delta feed and, when
+    manifest_path is set, as one JSON line per change appended to a manifest
+    file in DATA_DIR, so an indexer that can only see the data directory can
+    tail it from its last checkpoint.
+    """
+
+    def __init__(self, manifest_path=None) -> None:
+        self.manifest_path = manifest_path
+
+    @classmethod
+    def from_config(cls):
+        name = current_app.config["CHANGE_MANIFEST_NAME"]
+        data_dir = current_app.config["DATA_DIR"]
+        return cls(os.path.join(data_dir, name) if name and data_dir else None)
+
+    @staticmethod
+    def latest_sequence(session=None):
+        return (session or db.session).scalar(
+            sa.select(sa.func.max(FileChange.sequence))
+        ) or 0
+
+    @staticmethod
+    def since(cursor, limit):
+        """Return (changes after cursor, oldest first, at most limit; whether
+        there are more)."""
+        changes = (
+            db.session.execute(
+                sa.select(FileChange)
+                .where(FileChange.sequence > cursor)
+                .order_by(FileChange.sequence)
+                .limit(limit + 1)
+            )
+            .scalars()
+            .all()
+        )
+        return changes[:limit], len(changes) > limit
+
+    def write_manifest(self):
+        """Append the changes the manifest does not have yet; returns how many.
+
+        Workers serialize on an exclusive lock of the manifest itself. If the
+        manifest is ahead of the journal (e.g. the database was restored from a
+        backup) or unreadable it is rewritten from the start.
+        """
+        with open(self.manifest_path, "a+b") as manifest, so.Session(
+            db.engine
+        ) as session:
+            fcntl.flock(manifest, fcntl.LOCK_EX)
+            latest = self.latest_sequence(session)
+            try:
+                last_line = read_last_line(manifest)
+                written = json.loads(last_line)["sequence"] if last_line else 0
+            except (ValueError, KeyError, TypeError):
+                written = latest + 1
+            if written > latest:
+                manifest.truncate(0)
+                written = 0
+            if written == latest:
+                return 0
+
+            changes = session.execute(
+                sa.select(FileChange)
+                .where(FileChange.sequence > written, FileChange.sequence <= latest)
+                .order_by(FileChange.sequence)
+                .execution_options(yield_per=MANIFEST_BATCH_SIZE)
+            ).scalars()
+            count = 0
+            for batch in changes.partitions():
+                manifest.write(
+                    b"".join(
+                        json.dumps(change.to_dict()).encode() + b"\n"
+                        for change in batch
+                    )
+                )
+                count += len(batch)
+            manifest.flush()
+            return count
+
+
+def publish_changes(session):
+    """after_commit: bring the manifest up to date after File changes."""
+    if not session.info.pop("file_changes", False) or not has_app_context():
+        return
+    journal = ChangeJournal.from_config()
+    if journal.manifest_path is None:
+        return
+    try:
+        journal.write_manifest()
+    except (OSError, sa.exc.SQLAlchemyError) as error:
+        # The delta feed still has the changes; the next commit catches up.
+        current_app.logger.warning(f"Unable to update the change manifest: {error}")
+
+
+def discard_changes(session, previous_transaction):
+    session.info.pop("file_changes", None)
+
+
+def init_app(app):
+    if not sa.event.contains(so.Session, "after_commit", publish_changes):
+        sa.event.listen(so.Session, "after_commit", publish_changes)
+        sa.event.listen(so.Session, "after_soft_rollback", discard_changes)
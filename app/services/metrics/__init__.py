@@ -0,0 +1,8 @@
+from .instruments import (
+    CATALOG_PHASE_DURATION,
+    DOCKER_CALL_DURATION,
+    init_app,
+)
+from .manage import metrics
+
+__all__ = ["CATALOG_PHASE_DURATION", "DOCKER_CALL_DURATION", "init_app", "metrics"]
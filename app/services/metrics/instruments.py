@@ -0,0 +1,117 @@
+import time
+
+import sqlalchemy as sa
+from flask import g, has_request_context, request
+
+from .manage import metrics
+
+REQUESTS = metrics.counter(
+    "pai_admin_http_requests_total",
+    "HTTP requests by route, method and status code.",
+    ("method", "route", "status"),
+)
+REQUEST_DURATION = metrics.histogram(
+    "pai_admin_http_request_duration_seconds",
+    "Time spent handling HTTP requests (to the first byte for streamed responses).",
+    ("method", "route"),
+)
+REQUESTS_IN_PROGRESS = metrics.gauge(
+    "pai_admin_http_requests_in_progress",
+    "HTTP requests currently being handled.",
+    ("method", "route"),
+)
+DB_QUERY_DURATION = metrics.histogram(
+    "pai_admin_db_query_duration_seconds",
+    "Time spent executing SQL statements, by statement type.",
+    ("statement",),
+)
+DB_QUERIES_PER_REQUEST = metrics.histogram(
+    "pai_admin_db_queries_per_request",
+    "Number of SQL statements executed per HTTP request.",
+    ("route",),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500),
+)
+DOCKER_CALL_DURATION = metrics.histogram(
+    "pai_admin_docker_call_duration_seconds",
+    "Time spent in Docker API calls, by operation.",
+    ("operation",),
+)
+CATALOG_PHASE_DURATION = metrics.histogram(
+    "pai_admin_catalog_phase_duration_seconds",
+    "Time spent in each phase of a catalog sync.",
+    ("phase",),
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def current_route():
+    return request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+
+
+def before_request():
+    g.metrics_started = time.perf_counter()
+    g.db_queries = 0
+    REQUESTS_IN_PROGRESS.inc(method=request.method, route=current_route())
+
+
+def after_request(response):
+    if "metrics_started" in g:
+        g.metrics_status = response.status_code
+        g.metrics_duration = time.perf_counter() - g.metrics_started
+    return response
+
+
+def teardown_request(exc):
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return
+    method, route = request.method, current_route()
+    REQUESTS_IN_PROGRESS.dec(method=method, route=route)
+    # Streamed responses tear down when the stream ends; their duration is
+    # taken in after_request instead.
+    duration = g.get("metrics_duration", time.perf_counter() - started)
+    REQUEST_DURATION.observe(duration, method=method, route=route)
+    REQUESTS.inc(method=method, route=route, status=g.get("metrics_status", 500))
+    DB_QUERIES_PER_REQUEST.observe(g.get("db_queries", 0), route=route)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_started"].pop()
+    DB_QUERY_DURATION.observe(
+        time.perf_counter() - started,
+        statement=statement.lstrip().split(None, 1)[0].upper(),
+    )
+    if has_request_context() and "db_queries" in g:
+        g.db_queries += 1
+
+
+def handle_error(context):
+    # after_cursor_execute does not run for failed statements.
+    stack = (
+        context.connection.info.get("metrics_started") if context.connection else None
+    )
+    if stack:
+        stack.pop()
+
+
+def init_app(app):
+    metrics.configure(
+        directory=app.config["METRICS_DIR"],
+        flush_interval=app.config["METRICS_FLUSH_SECONDS"],
+    )
+    app.before_request(before_request)
+    app.after_request(after_request)
+    app.teardown_request(teardown_request)
+    if not sa.event.contains(
+        sa.engine.Engine, "before_cursor_execute", before_cursor_execute
+    ):
+        sa.event.listen(
+            sa.engine.Engine, "before_cursor_execute", before_cursor_execute
+        )
+        sa.event.listen(sa.engine.Engine, "after_cursor_execute", after_cursor_execute)
+        sa.event.listen(sa.engine.Engine, "handle_error", handle_error)
@@ -0,0 +1,250 @@
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, registry, name, documentation, labelnames=()) -> None:
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def key(self, labels):
+        return (self.name, tuple(str(labels[name]) for name in self.labelnames))
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        self.registry.add(self.key(labels), amount)
+
+
+class Gauge(Metric):
+    """A gauge summed over the live worker processes, e.g. requests in flight."""
+
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        self.registry.add(self.key(labels), amount)
+
+    def dec(self, amount=1, **labels):
+        self.registry.add(self.key(labels), -amount)
+
+    @contextmanager
+    def track(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        self.registry.observe(self.key(labels), self.buckets, value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+class MetricsRegistry:
+    """Process-local metric values, shared with other gunicorn workers via files.
+
+    Every worker periodically writes its values to metrics-<pid>.json in the
+    metrics directory; a scrape merges all files. Counters and histograms of
+    workers that have exited are kept so totals never go backwards, gauges only
+    count live workers. The directory is cleared when gunicorn starts.
+    """
+
+    def __init__(self) -> None:
+        self.metrics = {}
+        self.directory = None
+        self.flush_interval = 5.0
+        self._values = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._flusher_pid = None
+
+    def configure(self, directory, flush_interval):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = float(flush_interval)
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def add(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            self._dirty = True
+        self._ensure_flusher()
+
+    def observe(self, key, buckets, value):
+        with self._lock:
+            # Per-bucket (non-cumulative) counts, then sum and count.
+            values = self._values.get(key)
+            if values is None:
+                values = self._values[key] = [0] * (len(buckets) + 1) + [0.0, 0]
+            index = next(
+                (i for i, bound in enumerate(buckets) if value <= bound), len(buckets)
+            )
+            values[index] += 1
+            values[-2] += value
+            values[-1] += 1
+            self._dirty = True
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        if self.directory is None or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            if self._flusher_pid is not None:
+                # Forked: the parent's values are in the parent's file already.
+                self._values = {}
+            self._flusher_pid = os.getpid()
+        threading.Thread(
+            target=self._flush_loop, name="metrics-flush", daemon=True
+        ).start()
+        atexit.register(self.flush)
+
+    def _flush_loop(self):
+        pid = os.getpid()
+        while self._flusher_pid == pid:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        if self.directory is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            values = [
+                [name, list(labels), value]
+                for (name, labels), value in self._values.items()
+            ]
+            self._dirty = False
+        path = self.directory / f"metrics-{os.getpid()}.json"
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(values))
+        os.replace(temporary, path)
+
+    def clear_directory(self):
+        if self.directory is not None:
+            for path in self.directory.glob("metrics-*.json"):
+                path.unlink(missing_ok=True)
+
+    def collect(self):
+        """Merge the values of all worker processes, flushing our own first."""
+        self.flush()
+        merged = {}
+        for path in self.directory.glob("metrics-*.json") if self.directory else []:
+            pid = int(path.stem.removeprefix("metrics-"))
+            try:
+                values = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            alive = pid_alive(pid)
+            for name, labels, value in values:
+                metric = self.metrics.get(name)
+                if metric is None or (metric.kind == "gauge" and not alive):
+                    continue
+                key = (name, tuple(labels))
+                if isinstance(value, list):
+                    current = merged.get(key) or [0] * len(value)
+                    merged[key] = [a + b for a, b in zip(current, value)]
+                else:
+                    merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        merged = self.collect()
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for (name, labels), value in sorted(merged.items()):
+                if name != metric.name:
+                    continue
+                pairs = list(zip(metric.labelnames, labels))
+                if metric.kind != "histogram":
+                    lines.append(f"{name}{format_labels(pairs)} {format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (math.inf,), value[:-2]):
+                    cumulative += count
+                    le = "+Inf" if bound == math.inf else format_value(bound)
+                    lines.append(
+                        f"{name}_bucket{format_labels(pairs + [('le', le)])} {cumulative}"
+                    )
+                lines.append(
+                    f"{name}_sum{format_labels(pairs)} {format_value(value[-2])}"
+                )
+                lines.append(f"{name}_count{format_labels(pairs)} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def format_labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,3 @@
+from .manage import PasswordHasher, password_hasher
+
+__all__ = ["PasswordHasher", "password_hasher"]
@@ -0,0 +1,6 @@
+class HasherBusy(Exception):
+    pass
+
+
+class HasherUnavailable(HasherBusy):
+    """The hash timed out or the pool's worker process died."""
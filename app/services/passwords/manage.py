@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash,
+)
+
+from .exceptions import HasherBusy, HasherUnavailable
+
+# What werkzeug uses for the parts a method leaves out.
+PBKDF2_DEFAULTS = ("sha256", DEFAULT_PBKDF2_ITERATIONS)
+SCRYPT_DEFAULTS = (2**15, 8, 1)
+
+
+def normalize_method(method):
+    """Return a werkzeug hash method with every default spelled out, so that
+    e.g. "pbkdf2:sha256" and the "pbkdf2:sha256:600000" prefix of a stored hash
+    compare equal. Raises ValueError if a numeric parameter is not a number.
+    """
+    name, *args = method.split(":")
+    if name == "pbkdf2":
+        hash_name, iterations = (args + list(PBKDF2_DEFAULTS)[len(args) :])[:2]
+        return (name, hash_name, int(iterations))
+    if name == "scrypt":
+        parameters = (args + list(SCRYPT_DEFAULTS)[len(args) :])[:3]
+        return (name, *(int(value) for value in parameters))
+    return (name, *args)
+
+
+class PasswordHasher:
+    """Runs password hashing on a small process pool outside the request workers.
+
+    Hashing is CPU bound and holds the GIL, so doing it inline lets a burst of
+    logins stall every other request in the worker. At most max_queue hashes may
+    be queued or running per worker; beyond that HasherBusy is raised instead
+    of letting login attempts pile up. A hash that times out, or a pool whose
+    worker process died, raises HasherUnavailable; a broken pool is replaced
+    on the next call.
+    """
+
+    def __init__(self) -> None:
+        self.method = "scrypt:32768:8:1"
+        self.workers = 1
+        self.max_queue = 4
+        self.timeout = 10.0
+        self._executor = None
+        self._executor_pid = None
+        self._slots = threading.BoundedSemaphore(self.max_queue)
+        self._lock = threading.Lock()
+
+    def configure(self, method, workers, max_queue, timeout):
+        with self._lock:
+            self.method = method
+            self.workers = int(workers)
+            self.max_queue = int(max_queue)
+            self.timeout = float(timeout)
+            self._slots = threading.BoundedSemaphore(self.max_queue)
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                # "spawn" rather than fork: the workers are multi-threaded.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def discard(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy("Too many password checks in progress.")
+        executor = self.executor
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool as e:
+            self._slots.release()
+            self.discard(executor)
+            raise HasherUnavailable("Password hasher pool is broken.") from e
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot stays taken until the hash really finishes, even after a
+        # timeout, so a stuck pool fills up and fails fast with HasherBusy.
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout as e:
+            raise HasherUnavailable("Password check timed out.") from e
+        except BrokenProcessPool as e:
+            self.discard(executor)
+            raise HasherUnavailable("Password hasher pool is broken.") from e
+
+    def hash(self, password):
+        return self.run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        if not password_hash:
+            return False
+        return self.run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if password_hash was made with other settings than the current ones."""
+        try:
+            stored = normalize_method(password_hash.split("$", 1)[0])
+        except ValueError:
+            return True
+        return stored != normalize_method(self.method)
+
+
+password_hasher = PasswordHasher()
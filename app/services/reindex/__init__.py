@@ -0,0 +1,15 @@
+from .manage import (
+    ReindexScheduler,
+    catalog_container,
+    mark_reindexed,
+    pending_changes,
+    start_reindex_scheduler,
+)
+
+__all__ = [
+    "ReindexScheduler",
+    "catalog_container",
+    "mark_reindexed",
+    "pending_changes",
+    "start_reindex_scheduler",
+]
@@ -0,0 +1,144 @@
+import threading
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+
+from app import db
+from app.bin.locks import ProcessLock
+from app.models import CatalogState, FileChange
+from app.services.fleet import get_managed_container, managed_containers
+from app.services.jobs import RESTART_JOB, jobs, latest_job, restart_container
+
+LOCK_NAME = "reindex"
+
+
+def catalog_container(config):
+    """The managed container that indexes DATA_DIR (the first one by default)."""
+    for managed in managed_containers(config):
+        if managed.data_dir == config["DATA_DIR"]:
+            return managed
+    return get_managed_container(config)
+
+
+def pending_changes():
+    """Return (number of changes not yet re-indexed, latest sequence, time of the
+    latest change) from the change journal."""
+    indexed = sa.select(CatalogState.indexed_sequence).scalar_subquery()
+    count, latest, changed_at = db.session.execute(
+        sa.select(
+            sa.func.count(FileChange.sequence),
+            sa.func.max(FileChange.sequence),
+            sa.func.max(FileChange.created_at),
+        ).where(FileChange.sequence > sa.func.coalesce(indexed, 0))
+    ).one()
+    return count, latest, changed_at
+
+
+def mark_reindexed(sequence=None):
+    """Record that a restart re-indexes the changes up to sequence (by default
+    all of them)."""
+    if sequence is None:
+        sequence = sa.select(
+            sa.func.coalesce(sa.func.max(FileChange.sequence), 0)
+        ).scalar_subquery()
+    db.session.execute(
+        sa.update(CatalogState)
+        .where(CatalogState.indexed_sequence < sequence)
+        .values(indexed_sequence=sequence)
+    )
+    db.session.commit()
+
+
+class ReindexScheduler:
+    """Restarts the catalog's container once uploads and deletes have settled.
+
+    Every change to the catalog is in the change journal, so the catalog is
+    dirty while the journal has entries past indexed_sequence. Once the latest
+    of them is AUTO_REINDEX_QUIET_SECONDS old and the container and its index
+    are restartable, a single restart job is submitted for all of them: a burst
+    of uploads costs one index run instead of one per batch.
+
+    Like the watcher, every gunicorn worker starts one and only the holder of
+    the reindex lock acts.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+        config = app.config
+        self.quiet_seconds = float(config["AUTO_REINDEX_QUIET_SECONDS"])
+        self.check_seconds = float(config["AUTO_REINDEX_CHECK_SECONDS"])
+        self.container_minimum_uptime = config["MINIMUM_CONTAINER_UPTIME_SECONDS"]
+        self.index_minimum_uptime = config["MINIMUM_INDEX_UPTIME_SECONDS"]
+        self.lock = ProcessLock(LOCK_NAME, config["LOCK_DIR"])
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name="pai-admin-reindex", daemon=True
+        )
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.lock.release()
+
+    def run(self):
+        while not self.stop_event.wait(self.check_seconds):
+            if not self.lock.acquire():
+                continue
+            try:
+                with self.app.app_context():
+                    self.check()
+            except Exception:
+                self.app.logger.exception("Auto-reindex check failed")
+
+    def check(self):
+        """Submit a restart job if one is due; returns the job or None."""
+        count, latest, changed_at = pending_changes()
+        if not count:
+            return None
+        # SQLite hands back naive datetimes, stored in UTC.
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        if (now - changed_at.replace(tzinfo=None)).total_seconds() < self.quiet_seconds:
+            return None
+
+        managed = catalog_container(self.app.config)
+        if managed is None:
+            return None
+        job = latest_job(RESTART_JOB, managed.name)
+        if job is not None and job.is_active:
+            return None
+        container = managed.container(
+            cache_ttl=self.app.config["CONTAINER_CACHE_TTL_SECONDS"]
+        )
+        index = managed.index()
+        if not (
+            container.is_restartable(
+                must_be_up_for_seconds=self.container_minimum_uptime
+            )
+            and index.is_restartable(must_be_up_for_seconds=self.index_minimum_uptime)
+        ):
+            return None
+
+        job, created = jobs.submit(
+            RESTART_JOB,
+            managed.name,
+            restart_container,
+            container,
+            index,
+            self.app.config,
+        )
+        if created:
+            mark_reindexed(latest)
+            self.app.logger.info(
+                f"Auto-reindex: restart job {job.id} submitted for container '{managed.name}' after {count} change(s)"
+            )
+        return job
+
+
+def start_reindex_scheduler(app):
+    if not app.config["AUTO_REINDEX_ENABLED"]:
+        return None
+    return ReindexScheduler(app).start()
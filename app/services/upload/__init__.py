@@ -0,0 +1,3 @@
+from .manage import ChunkedUpload
+
+__all__ = ["ChunkedUpload"]
@@ -0,0 +1,23 @@
+class UploadError(Exception):
+    status_code = 400
+
+
+class UploadNotFound(UploadError):
+    status_code = 404
+
+
+class UploadConflict(UploadError):
+    status_code = 409
+
+
+class OffsetMismatch(UploadError):
+    status_code = 409
+
+
+class UploadTooLarge(UploadError):
+    status_code = 413
+
+
+class ChecksumMismatch(UploadError):
+    # tus checksum extension: "460 Checksum Mismatch"
+    status_code = 460
@@ -0,0 +1,223 @@
+import base64
+import binascii
+import fcntl
+import hashlib
+import json
+import os
+import re
+import secrets
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.services.catalog import file_digest
+
+from .exceptions import (
+    ChecksumMismatch,
+    OffsetMismatch,
+    UploadConflict,
+    UploadError,
+    UploadNotFound,
+    UploadTooLarge,
+)
+
+UPLOAD_DIR_NAME = ".uploads"
+UPLOAD_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class ChunkedUpload:
+    """A resumable upload, following the core of the tus protocol.
+
+    Chunks are appended to "<DATA_DIR>/.uploads/<id>.part" at the offset the client
+    says it is at, with the upload's metadata kept next to it in "<id>.json" so
+    any worker can continue an upload another worker started. When the last byte
+    arrives the file is verified and moved into DATA_DIR in a single step.
+    """
+
+    def __init__(self, data_dir, upload_id) -> None:
+        if not UPLOAD_ID_PATTERN.fullmatch(upload_id):
+            raise UploadNotFound(f"Upload '{upload_id}' does not exist.")
+        self.data_dir = Path(data_dir)
+        self.id = upload_id
+        self.part_file = self.upload_dir(data_dir) / f"{upload_id}.part"
+        self.info_file = self.upload_dir(data_dir) / f"{upload_id}.json"
+        try:
+            self.info = json.loads(self.info_file.read_text())
+        except FileNotFoundError:
+            raise UploadNotFound(f"Upload '{upload_id}' does not exist.")
+
+    @staticmethod
+    def upload_dir(data_dir):
+        return Path(data_dir) / UPLOAD_DIR_NAME
+
+    @classmethod
+    def create(cls, data_dir, filename, length, max_length, checksum=None):
+        if length > max_length:
+            raise UploadTooLarge(
+                f"File '{filename}' is larger than the maximum upload size."
+            )
+        if (Path(data_dir) / filename).exists():
+            raise UploadConflict(
+                f"File '{filename}' already exists in directory. Please delete the existing file if you want to replace it."
+            )
+        upload_dir = cls.upload_dir(data_dir)
+        upload_dir.mkdir(exist_ok=True)
+        upload_id = secrets.token_hex(16)
+        (upload_dir / f"{upload_id}.part").touch()
+        (upload_dir / f"{upload_id}.json").write_text(
+            json.dumps(
+                {
+                    "filename": filename,
+                    "length": length,
+                    "checksum": checksum,
+                    "created": time.time(),
+                }
+            )
+        )
+        return cls(data_dir, upload_id)
+
+    @classmethod
+    def save_stream(cls, data_dir, stream):
+        """Copy a whole stream into a new part file, hashing it on the way.
+
+        Used for plain multipart uploads, so they are hashed without being read
+        a second time. Returns the part file and its SHA-256.
+        """
+        upload_dir = cls.upload_dir(data_dir)
+        upload_dir.mkdir(exist_ok=True)
+        part_file = upload_dir / f"{secrets.token_hex(16)}.part"
+        digest = hashlib.sha256()
+        with open(part_file, "wb") as part:
+            while True:
+                buffer = stream.read(COPY_BUFFER_SIZE)
+                if not buffer:
+                    break
+                digest.update(buffer)
+                part.write(buffer)
+        return part_file, digest.hexdigest()
+
+    @classmethod
+    def remove_expired(cls, data_dir, max_age_seconds):
+        cutoff = time.time() - max_age_seconds
+        upload_dir = cls.upload_dir(data_dir)
+        if not upload_dir.exists():
+            return
+        for file in upload_dir.iterdir():
+            try:
+                if file.stat().st_mtime < cutoff:
+                    file.unlink(missing_ok=True)
+            except FileNotFoundError:
+                continue
+
+    @property
+    def filename(self):
+        return self.info["filename"]
+
+    @property
+    def length(self):
+        return self.info["length"]
+
+    @property
+    def offset(self):
+        try:
+            return self.part_file.stat().st_size
+        except FileNotFoundError:
+            raise UploadNotFound(f"Upload '{self.id}' does not exist.")
+
+    @property
+    def is_complete(self):
+        return self.offset == self.length
+
+    @staticmethod
+    def parse_checksum(header):
+        """Parse a tus "Upload-Checksum: sha256 <base64 digest>" header."""
+        if not header:
+            return None
+        try:
+            algorithm, digest = header.split(" ", 1)
+            digest = base64.b64decode(digest, validate=True)
+        except (ValueError, binascii.Error):
+            raise UploadError("Malformed Upload-Checksum header.")
+        if algorithm.lower() != "sha256":
+            raise UploadError(f"Unsupported checksum algorithm '{algorithm}'.")
+        return digest
+
+    def append(self, stream, offset, checksum=None):
+        """Append a chunk read from stream at offset, returning the new offset.
+
+        The chunk is copied to disk in COPY_BUFFER_SIZE pieces, so it never has
+        to be held in memory. A chunk that fails its checksum is cut off again.
+        """
+        with self.locked() as part:
+            current_offset = os.fstat(part.fileno()).st_size
+            if offset != current_offset:
+                raise OffsetMismatch(
+                    f"Upload is at offset {current_offset}, not {offset}."
+                )
+            part.seek(offset)
+            digest = hashlib.sha256()
+            written = 0
+            while True:
+                buffer = stream.read(COPY_BUFFER_SIZE)
+                if not buffer:
+                    break
+                written += len(buffer)
+                if offset + written > self.length:
+                    part.truncate(offset)
+                    raise UploadTooLarge("Chunk goes past the declared upload length.")
+                digest.update(buffer)
+                part.write(buffer)
+            if checksum is not None and digest.digest() != checksum:
+                part.truncate(offset)
+                raise ChecksumMismatch("Chunk checksum does not match.")
+            part.flush()
+            os.fsync(part.fileno())
+            return offset + written
+
+    @contextmanager
+    def locked(self):
+        """Open the part file with the upload's exclusive lock held.
+
+        Raises UploadNotFound if the upload was finished or aborted, including
+        by a request that held the lock while this one was waiting for it.
+        """
+        try:
+            part = open(self.part_file, "r+b")
+        except FileNotFoundError:
+            raise UploadNotFound(f"Upload '{self.id}' does not exist.")
+        with part:
+            fcntl.flock(part, fcntl.LOCK_EX)
+            if not self.part_file.exists():
+                raise UploadNotFound(f"Upload '{self.id}' does not exist.")
+            yield part
+
+    def finish(self, store):
+        """Verify the completed upload and hand it to store.
+
+        store(part file, filename, SHA-256) is Catalog.add_file, which moves the
+        file into DATA_DIR and handles duplicate content; its return value is
+        returned. It runs with the upload's lock held, so of two requests that
+        complete the same upload only one stores it. The upload is removed
+        afterwards, whether store succeeded or not.
+        """
+        with self.locked() as part:
+            offset = os.fstat(part.fileno()).st_size
+            if offset != self.length:
+                raise OffsetMismatch(
+                    f"Upload is at offset {offset} of {self.length} bytes."
+                )
+            try:
+                content_hash = file_digest(self.part_file)
+                expected = self.info.get("checksum")
+                if expected and content_hash != expected.lower():
+                    raise ChecksumMismatch(
+                        f"Checksum of file '{self.filename}' does not match."
+                    )
+                return store(self.part_file, self.filename, content_hash)
+            finally:
+                self.abort()
+
+    def abort(self):
+        self.part_file.unlink(missing_ok=True)
+        self.info_file.unlink(missing_ok=True)
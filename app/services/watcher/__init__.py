@@ -0,0 +1,3 @@
+from .manage import Watcher, is_watcher_running, start_watcher
+
+__all__ = ["Watcher", "is_watcher_running", "start_watcher"]
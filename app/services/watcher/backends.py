@@ -0,0 +1,179 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from errno import ENOENT
+
+from .exceptions import InotifyUnavailable
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+EVENT_HEADER = struct.Struct("iIII")
+READ_BUFFER_SIZE = 64 * 1024
+
+
+class InotifyBackend:
+    """Directory events from the Linux inotify API, loaded from libc with ctypes.
+
+    With recursive set every subdirectory (except dot directories) gets its own
+    watch. poll() returns the set of paths, relative to the watched directory,
+    that changed, or None when the kernel event queue overflowed, the directory
+    itself went away or a subdirectory was removed or moved out, and the caller
+    has to fall back to a full rescan.
+    """
+
+    name = "inotify"
+    mask = (
+        IN_CLOSE_WRITE
+        | IN_MOVED_FROM
+        | IN_MOVED_TO
+        | IN_CREATE
+        | IN_DELETE
+        | IN_DELETE_SELF
+        | IN_MOVE_SELF
+    )
+
+    def __init__(self, path, recursive=False) -> None:
+        self.path = os.fspath(path)
+        self.recursive = recursive
+        self.directories = {}
+        library = ctypes.util.find_library("c")
+        if library is None:
+            raise InotifyUnavailable("libc could not be found.")
+        libc = ctypes.CDLL(library, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise InotifyUnavailable("libc does not provide inotify.")
+
+        self.libc = libc
+        self.fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise InotifyUnavailable(os.strerror(ctypes.get_errno()))
+        try:
+            self.add_watch("")
+            if recursive:
+                self.add_tree("")
+        except InotifyUnavailable:
+            os.close(self.fd)
+            raise
+
+    def add_watch(self, relative):
+        path = os.path.join(self.path, relative)
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            if relative and errno == ENOENT:
+                return
+            # ENOSPC means fs.inotify.max_user_watches is too low for the tree.
+            raise InotifyUnavailable(f"Unable to watch '{path}': {os.strerror(errno)}")
+        self.directories[wd] = relative
+
+    def remove_tree(self, relative):
+        """Forget the watches of a subdirectory that was moved or deleted."""
+        prefix = relative + "/"
+        for wd, directory in list(self.directories.items()):
+            if directory == relative or directory.startswith(prefix):
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.directories[wd]
+
+    def add_tree(self, relative):
+        """Watch every subdirectory of relative; returns the files found in them,
+        which may have arrived before their directory was watched."""
+        files = set()
+        for directory, subdirectories, names in os.walk(
+            os.path.join(self.path, relative)
+        ):
+            subdirectories[:] = [
+                name for name in subdirectories if not name.startswith(".")
+            ]
+            prefix = os.path.relpath(directory, self.path)
+            prefix = "" if prefix == "." else prefix.replace(os.sep, "/") + "/"
+            for name in subdirectories:
+                self.add_watch(prefix + name)
+            files.update(prefix + name for name in names)
+        return files
+
+    def poll(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, READ_BUFFER_SIZE)
+        except BlockingIOError:
+            return set()
+
+        names = set()
+        rescan = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            directory = self.directories.get(wd)
+            if directory is None:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                if not directory:
+                    return None
+                # The parent directory reports the removal of a subdirectory.
+                if mask & IN_IGNORED:
+                    del self.directories[wd]
+                continue
+            if not name:
+                continue
+            path = (
+                f"{directory}/{os.fsdecode(name)}" if directory else os.fsdecode(name)
+            )
+            if mask & IN_ISDIR:
+                if not self.recursive or name.startswith(b"."):
+                    continue
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    self.remove_tree(path)
+                    rescan = True
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_watch(path)
+                    names.update(self.add_tree(path))
+                continue
+            names.add(path)
+        return None if rescan else names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingBackend:
+    """Fallback for filesystems that do not deliver inotify events (e.g. network
+    or VM bind mounts): asks for a full rescan every interval seconds."""
+
+    name = "polling"
+
+    def __init__(self, interval, stop_event) -> None:
+        self.interval = interval
+        self.stop_event = stop_event
+        self.next_scan = time.monotonic() + interval
+
+    def poll(self, timeout):
+        remaining = self.next_scan - time.monotonic()
+        if remaining > timeout:
+            self.stop_event.wait(timeout)
+            return set()
+        self.stop_event.wait(max(remaining, 0))
+        self.next_scan = time.monotonic() + self.interval
+        return None
+
+    def close(self):
+        return
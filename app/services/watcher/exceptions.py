@@ -0,0 +1,2 @@
+class InotifyUnavailable(Exception):
+    pass
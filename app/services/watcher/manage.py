@@ -0,0 +1,132 @@
+import threading
+import time
+
+from app.bin.locks import Heartbeat, ProcessLock
+from app.services.catalog import Catalog
+
+from .backends import InotifyBackend, PollingBackend
+from .exceptions import InotifyUnavailable
+
+LOCK_NAME = "watcher"
+ERROR_BACKOFF_SECONDS = 5
+
+
+class Watcher:
+    """Keeps the File table in step with DATA_DIR from a background thread.
+
+    Every gunicorn worker starts a Watcher, but only the one holding the watcher
+    lock does any work; the others stay on standby and take over if it exits.
+    While it watches, the active one keeps a heartbeat file fresh for
+    is_watcher_running.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+        config = app.config
+        self.data_dir = config["DATA_DIR"]
+        self.backend_name = config["WATCHER_BACKEND"]
+        self.recursive = config["SCAN_RECURSIVE"]
+        self.debounce_seconds = float(config["WATCHER_DEBOUNCE_SECONDS"])
+        self.max_delay_seconds = float(config["WATCHER_MAX_DELAY_SECONDS"])
+        self.poll_interval_seconds = float(config["WATCHER_POLL_INTERVAL_SECONDS"])
+        self.reconcile_seconds = float(config["WATCHER_RECONCILE_SECONDS"])
+        self.lock = ProcessLock(LOCK_NAME, config["LOCK_DIR"])
+        self.heartbeat = watcher_heartbeat(config)
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name="pai-admin-watcher", daemon=True
+        )
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.lock.release()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            if not self.lock.acquire():
+                self.stop_event.wait(self.poll_interval_seconds)
+                continue
+            try:
+                self.watch()
+            except Exception:
+                self.app.logger.exception("Watcher failed, restarting")
+                self.stop_event.wait(ERROR_BACKOFF_SECONDS)
+
+    def open_backend(self):
+        if self.backend_name in ("auto", "inotify"):
+            try:
+                return InotifyBackend(self.data_dir, recursive=self.recursive)
+            except InotifyUnavailable as error:
+                if self.backend_name == "inotify":
+                    raise
+                self.app.logger.warning(
+                    f"inotify unavailable ({error}), falling back to polling"
+                )
+        return PollingBackend(self.poll_interval_seconds, self.stop_event)
+
+    def sync(self, names=None):
+        with self.app.app_context():
+            catalog = Catalog.from_config()
+            if names is None:
+                return catalog.sync()
+            return catalog.sync_names(names)
+
+    def watch(self):
+        backend = self.open_backend()
+        self.app.logger.info(
+            f"Watching '{self.data_dir}' for changes using {backend.name}"
+        )
+        self.heartbeat.start()
+        try:
+            self.sync()
+            last_reconcile = time.monotonic()
+            pending = set()
+            first_event = last_event = 0.0
+            while not self.stop_event.is_set():
+                names = backend.poll(self.debounce_seconds)
+                now = time.monotonic()
+                if names is None or now - last_reconcile >= self.reconcile_seconds:
+                    self.sync()
+                    pending.clear()
+                    last_reconcile = now
+                    continue
+                if names:
+                    if not pending:
+                        first_event = now
+                    pending.update(names)
+                    last_event = now
+                if pending and (
+                    now - last_event >= self.debounce_seconds
+                    or now - first_event >= self.max_delay_seconds
+                ):
+                    self.sync(pending)
+                    pending = set()
+        finally:
+            self.heartbeat.stop()
+            backend.close()
+
+
+def watcher_heartbeat(config):
+    return Heartbeat(LOCK_NAME, config["LOCK_DIR"], config["WATCHER_HEARTBEAT_SECONDS"])
+
+
+def start_watcher(app):
+    if not app.config["WATCHER_ENABLED"]:
+        return None
+    return Watcher(app).start()
+
+
+def is_watcher_running(app):
+    """Whether some worker is watching DATA_DIR, judged by its heartbeat file.
+
+    The watcher lock is never probed here: taking it, even briefly, from a
+    request could win the election against a standby watcher.
+    """
+    if not app.config["WATCHER_ENABLED"]:
+        return False
+    return watcher_heartbeat(app.config).is_alive()
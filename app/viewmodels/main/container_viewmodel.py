@@ -0,0 +1,184 @@
+from datetime import datetime, timedelta, timezone
+
+from flask import abort, current_app, render_template
+
+from app.bin.utils import make_etag
+from app.models import Job
+from app.services.fleet import get_managed_container
+from app.services.jobs import (
+    RESTART_JOB,
+    jobs,
+    latest_job,
+    latest_job_state,
+    restart_container,
+)
+from app.services.reindex import catalog_container, mark_reindexed
+from app.viewmodels.shared.viewmodelbase import ViewModelBase
+
+PHASE_NAMES = {
+    "restarting": "Restarting container",
+    # Phases of jobs recorded before restarts went through Container.restart.
+    "stopping": "Stopping container",
+    "starting": "Starting container",
+    "waiting_for_index": "Waiting for index to start",
+    "indexing": "Indexing",
+}
+# How long a finished restart job stays visible in the modal.
+FINISHED_JOB_DISPLAY_SECONDS = 10 * 60
+
+
+class ContainerViewModel(ViewModelBase):
+    def __init__(self):
+        super().__init__()
+        self.managed = get_managed_container(
+            current_app.config, self.request.args.get("container")
+        )
+        if self.managed is None:
+            abort(404)
+        self.container_name = self.managed.name
+        self.container_minimum_uptime = current_app.config[
+            "MINIMUM_CONTAINER_UPTIME_SECONDS"
+        ]
+        self.index_minimum_uptime = current_app.config["MINIMUM_INDEX_UPTIME_SECONDS"]
+        self.container = self.managed.container(
+            cache_ttl=current_app.config["CONTAINER_CACHE_TTL_SECONDS"]
+        )
+        self.index = self.managed.index()
+
+    def is_container_restartable(self):
+        return self.container.is_restartable(
+            must_be_up_for_seconds=self.container_minimum_uptime
+        )
+
+    def is_index_restartable(self):
+        return self.index.is_restartable(
+            must_be_up_for_seconds=self.index_minimum_uptime
+        )
+
+    def index_status(self):
+        if self.index.is_running():
+            return f"Running ({self.index.running_status()[1]})"
+        elif self.index.is_complete():
+            return f"Complete ({self.index.complete_status()[1]})"
+        return "Unknown"
+
+    def status_etag(self):
+        return make_etag("container-status", self.container.snapshot.fingerprint)
+
+    def uptime_etag(self):
+        # The uptime is shown humanized, so it changes without a state change.
+        return make_etag(
+            "container-uptime",
+            self.container.snapshot.fingerprint,
+            self.container.uptime[1],
+        )
+
+    def index_status_etag(self):
+        return make_etag("container-index", self.index.fingerprint, self.index_status())
+
+    def fingerprint(self):
+        """Identifies everything the modal partials show, without rendering them.
+
+        Besides the container and index state this covers what changes with
+        time alone: the humanized uptime, whether the uptimes are long enough
+        for a restart and whether a finished job is still displayed.
+        """
+        job = latest_job_state(RESTART_JOB, self.container_name)
+        job_displayed = job is not None and (
+            job.status in Job.ACTIVE_STATUSES
+            or datetime.now(timezone.utc).replace(tzinfo=None) - job.updated_at
+            <= timedelta(seconds=FINISHED_JOB_DISPLAY_SECONDS)
+        )
+        return (
+            self.container.snapshot.fingerprint,
+            self.container.uptime[1],
+            self.index.fingerprint,
+            self.is_container_restartable(),
+            self.is_index_restartable(),
+            tuple(job) if job_displayed else None,
+        )
+
+    def render_status(self):
+        return render_template(
+            "main/_partials/container_status.html",
+            container_status=self.container.status,
+        )
+
+    def render_uptime(self):
+        return render_template(
+            "main/_partials/container_uptime.html",
+            container_uptime=self.container.uptime[1],
+        )
+
+    def render_index_status(self):
+        return render_template(
+            "main/_partials/container_index.html",
+            index_status=self.index_status(),
+        )
+
+    def restart_job(self):
+        job = latest_job(RESTART_JOB, self.container_name)
+        if job is None or job.is_active:
+            return job
+        # SQLite hands back naive datetimes, stored in UTC.
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        if now - job.updated_at > timedelta(seconds=FINISHED_JOB_DISPLAY_SECONDS):
+            return None
+        return job
+
+    def submit_restart(self):
+        """Queue a restart job, or return the one already in flight."""
+        job, created = jobs.submit(
+            RESTART_JOB,
+            self.container_name,
+            restart_container,
+            self.container,
+            self.index,
+            current_app.config,
+        )
+        if created and self.managed == catalog_container(current_app.config):
+            # The restart re-indexes everything, including pending changes.
+            mark_reindexed()
+        return job, created
+
+    def render_restart_job(self, job=None):
+        job = job or self.restart_job()
+        if job is None:
+            return ""
+        return render_template(
+            "main/_partials/container_restart_job.html",
+            job=job.to_dict(),
+            phase_names=PHASE_NAMES,
+        )
+
+    def render_restart(self):
+        job = self.restart_job()
+        if job is not None and job.is_active:
+            return render_template(
+                "main/_partials/container_restart_disabled.html",
+                button_text="Restart in progress...",
+            )
+        container_restartable = self.is_container_restartable()
+        index_restartable = self.is_index_restartable()
+        if container_restartable and index_restartable:
+            return render_template(
+                "main/_partials/container_restart_enabled.html",
+                container_name=self.container_name,
+            )
+        elif container_restartable and not index_restartable:
+            button_text = "Waiting for index to complete..."
+        else:
+            button_text = "Waiting for container to start..."
+        return render_template(
+            "main/_partials/container_restart_disabled.html", button_text=button_text
+        )
+
+    def render_partials(self):
+        """All modal partials, keyed by the SSE event name they are sent as."""
+        return {
+            "status": self.render_status(),
+            "uptime": self.render_uptime(),
+            "index": self.render_index_status(),
+            "restart": self.render_restart(),
+            "job": self.render_restart_job(),
+        }
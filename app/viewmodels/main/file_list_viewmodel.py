@@ -0,0 +1,180 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+import sqlalchemy as sa
+from flask import Response, current_app
+
+from app import db
+from app.bin.cache import fragments
+from app.bin.utils import make_etag
+from app.models import File, get_catalog_generation
+from app.viewmodels.shared.viewmodelbase import ViewModelBase
+
+FILE_TYPES = {
+    ".txt": "Text File",
+    ".doc": "Word Document",
+    ".docx": "Word Document",
+    ".pdf": "PDF File",
+}
+SORTABLE_COLUMNS = {
+    "name": File.name,
+    "extension": File.extension,
+    "size": File.size,
+    "upload_date": File.upload_date,
+}
+MAX_PAGE_LENGTH = 500
+
+
+class FileListViewModel(ViewModelBase):
+    """One page of the file table, following the DataTables server-side protocol.
+
+    Pages are normally fetched with LIMIT/OFFSET. When the client pages forward it
+    sends the cursor of the previous page's last row as "after", and the page is
+    fetched with a keyset condition on the sort column's index instead, so deep
+    pages cost the same as the first one.
+    """
+
+    def __init__(self):
+        super().__init__()
+        args = self.request.args
+        self.draw = args.get("draw", 0, type=int)
+        self.start = max(args.get("start", 0, type=int), 0)
+        self.length = args.get("length", 25, type=int)
+        if self.length < 1 or self.length > MAX_PAGE_LENGTH:
+            self.length = MAX_PAGE_LENGTH
+        self.search = args.get("search[value]", "").strip()
+
+        column_index = args.get("order[0][column]", 0, type=int)
+        column_name = args.get(f"columns[{column_index}][name]") or args.get(
+            f"columns[{column_index}][data]", "name"
+        )
+        self.sort_name = column_name if column_name in SORTABLE_COLUMNS else "name"
+        self.sort_column = SORTABLE_COLUMNS[self.sort_name]
+        self.descending = args.get("order[0][dir]", "asc") == "desc"
+        self.after = self.decode_cursor(args.get("after"))
+        self._page_key = None
+
+    def search_condition(self):
+        if not self.search:
+            return None
+        if current_app.config["FILE_SEARCH_MODE"] == "prefix":
+            # A range on the name index, instead of LIKE which SQLite can only
+            # serve from an index when the column is declared NOCASE.
+            upper_bound = self.search[:-1] + chr(ord(self.search[-1]) + 1)
+            return sa.and_(File.name >= self.search, File.name < upper_bound)
+        pattern = (
+            self.search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        return File.name.like(f"%{pattern}%", escape="\\")
+
+    def decode_cursor(self, cursor):
+        """Return (sort value, id) from an "after" cursor, or None if it is
+        missing or malformed, in which case the page falls back to OFFSET."""
+        if not cursor:
+            return None
+        try:
+            value, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if isinstance(id, bool) or not isinstance(id, int):
+                return None
+            if self.sort_name == "size":
+                if isinstance(value, bool) or not isinstance(value, int):
+                    return None
+            elif not isinstance(value, str):
+                return None
+            elif self.sort_name == "upload_date":
+                value = datetime.fromisoformat(value)
+        except (binascii.Error, ValueError, TypeError):
+            return None
+        return value, id
+
+    def encode_cursor(self, file):
+        value = getattr(file, self.sort_name)
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        return base64.urlsafe_b64encode(json.dumps([value, file.id]).encode()).decode()
+
+    def query(self):
+        condition = self.search_condition()
+        query = sa.select(File)
+        if condition is not None:
+            query = query.where(condition)
+
+        if self.descending:
+            query = query.order_by(self.sort_column.desc(), File.id.desc())
+        else:
+            query = query.order_by(self.sort_column.asc(), File.id.asc())
+
+        if self.after is not None:
+            key = sa.tuple_(self.sort_column, File.id)
+            after = sa.tuple_(*self.after)
+            query = query.where(key < after if self.descending else key > after)
+        else:
+            query = query.offset(self.start)
+        return query.limit(self.length), condition
+
+    def page_key(self):
+        """Identifies the page contents: the catalog generation plus every
+        request argument except DataTables' draw counter."""
+        if self._page_key is None:
+            args = sorted(
+                (key, value)
+                for key, value in self.request.args.items(multi=True)
+                if key not in ("draw", "_")
+            )
+            self._page_key = make_etag(
+                "files", get_catalog_generation(), urlencode(args)
+            )
+        return self._page_key
+
+    def etag(self):
+        return make_etag(self.page_key(), self.draw)
+
+    def render(self):
+        """The page as a JSON response, from the shared fragment cache when the
+        same page of the same catalog generation was rendered before."""
+        key = self.page_key()
+        body = fragments.get(key)
+        if body is None:
+            body = json.dumps(self.page(), separators=(",", ":"))
+            fragments.set(key, body)
+        # The cached page is a JSON object; splice the draw counter in front.
+        return Response(f'{{"draw":{self.draw},{body[1:]}', mimetype="application/json")
+
+    @staticmethod
+    def to_row(file):
+        return {
+            "id": file.id,
+            "name": file.name,
+            "path": file.full_name,
+            "extension": file.extension,
+            "file_type": FILE_TYPES.get(file.extension, ""),
+            "size": file.size,
+            # ISO 8601 in UTC; the page renders it as a relative date.
+            "upload_date": (
+                file.upload_date.replace(tzinfo=timezone.utc).isoformat()
+                if file.upload_date
+                else None
+            ),
+        }
+
+    def page(self):
+        query, condition = self.query()
+        files = db.session.execute(query).scalars().all()
+        records_total = db.session.scalar(sa.select(sa.func.count(File.id)))
+        if condition is None:
+            records_filtered = records_total
+        else:
+            records_filtered = db.session.scalar(
+                sa.select(sa.func.count(File.id)).where(condition)
+            )
+        return {
+            "recordsTotal": records_total,
+            "recordsFiltered": records_filtered,
+            "data": [self.to_row(file) for file in files],
+            "cursor": self.encode_cursor(files[-1]) if files else None,
+        }
@@ -0,0 +1,16 @@
+from flask import current_app
+
+from app.services.fleet import Fleet
+from app.services.reindex import catalog_container
+from app.viewmodels.shared.viewmodelbase import ViewModelBase
+
+
+class FleetViewModel(ViewModelBase):
+    def __init__(self):
+        super().__init__()
+        self.title = f"{current_app.config['DEFAULT_TITLE']} - Fleet"
+        self.containers = Fleet(current_app.config).overview()
+        # Files are only managed in DATA_DIR; see load_managed_containers.
+        self.data_dir = current_app.config["DATA_DIR"]
+        catalog = catalog_container(current_app.config)
+        self.catalog_container = catalog.name if catalog else None
@@ -1,61 +1,60 @@
-from pathlib import Path
+import shutil
 
-import arrow
 import sqlalchemy as sa
 from flask import current_app
 
 from app import db
-from app.models import File, get_all_files
+from app.bin.utils import format_size
+from app.models import StorageUsage
+from app.services.catalog import Catalog
+from app.services.watcher import is_watcher_running
+from app.viewmodels.main.file_list_viewmodel import FILE_TYPES
 from app.viewmodels.shared.viewmodelbase import ViewModelBase
 
 
 class MainViewModel(ViewModelBase):
     def __init__(self):
         super().__init__()
-        self.load_files_to_db()
-        self.files = self.get_files()
+        if not is_watcher_running(current_app):
+            self.load_files_to_db()
 
+        self.storage_usage = self.load_storage_usage()
+        self.total_files = sum(row["files"] for row in self.storage_usage)
+        self.total_size = format_size(sum(row["bytes"] for row in self.storage_usage))
+        self.disk_usage = self.load_disk_usage()
         self.flash_error()
 
     def load_files_to_db(self):
         current_app.logger.info("Loading files to DB...")
+        Catalog.from_config().sync()
+
+    @staticmethod
+    def load_storage_usage():
+        """Per-extension totals, one row per extension however many files there are."""
+        rows = db.session.execute(
+            sa.select(StorageUsage)
+            .where(StorageUsage.files > 0)
+            .order_by(StorageUsage.bytes.desc())
+        ).scalars()
+        return [
+            {
+                "extension": row.extension,
+                "file_type": FILE_TYPES.get(row.extension, row.extension),
+                "files": row.files,
+                "bytes": row.bytes,
+                "size": format_size(row.bytes),
+            }
+            for row in rows
+        ]
 
-        supported_extensions = {
-            f".{extension.removeprefix('.')}"
-            for extension in current_app.config["SUPPORTED_FILE_EXTENSIONS"]
+    @staticmethod
+    def load_disk_usage():
+        try:
+            usage = shutil.disk_usage(current_app.config["DATA_DIR"])
+        except (OSError, TypeError):
+            return None
+        return {
+            "free": format_size(usage.free),
+            "total": format_size(usage.total),
+            "free_percent": usage.free / usage.total * 100 if usage.total else 0,
         }
-        data_directory = Path(current_app.config["DATA_DIR"])
-        data_directory_files = (
-            file.resolve()
-            for file in data_directory.glob("*")
-            if file.suffix in supported_extensions
-        )
-        data_directory_file_names = []
-        for file in data_directory_files:
-            name = file.name
-            data_directory_file_names.append(name)
-            existing_file = db.session.scalar(sa.select(File).where(File.name == name))
-            if existing_file is None:
-                current_app.logger.info(f"Creating DB entry for file '{file.name}'")
-                size = file.stat().st_size
-                extension = file.suffix
-                new_file = File(name=name, extension=extension, size=size)
-                new_file.set_fullname()
-                db.session.add(new_file)
-                db.session.commit()
-        db_files = get_all_files()
-        db_file_to_remove = [
-            file for file in db_files if file.name not in data_directory_file_names
-        ]
-        for file in db_file_to_remove:
-            current_app.logger.info(
-                f"Removing file '{file.name}' from DB as it is no longer in the directory"
-            )
-            db.session.delete(file)
-            db.session.commit()
-
-    def get_files(self):
-        files = db.session.execute(sa.select(File).order_by(File.name)).scalars().all()
-        for file in files:
-            file.friendly_upload_date = arrow.get(file.upload_date).humanize()  # type: ignore
-        return files
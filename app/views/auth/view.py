@@ -7,6 +7,8 @@ from flask_login import current_user, login_user, logout_user
 from app import db
 from app.bin.utils import log_request
 from app.models import User
+from app.services.passwords import password_hasher
+from app.services.passwords.exceptions import HasherBusy
 from app.views.auth import bp
 from app.views.auth.forms import LoginForm
 
@@ -25,12 +27,37 @@ def login():
         )
         user = db.session.scalar(sa.select(User).where(User.username == username))
         next_page = request.args.get("next") or ""
-        if user is None or not user.check_password(form.password.data):
+        try:
+            password_valid = user is not None and password_hasher.verify(
+                user.password_hash, form.password.data
+            )
+        except HasherBusy:
+            current_app.logger.warning(
+                f"User:{username} | IP: {request.remote_addr} - Password hasher busy"
+            )
+            flash("Too many login attempts right now. Please try again.", "warning")
+            return redirect(url_for("auth.login", next=unquote_plus(next_page)))
+        if not password_valid:
             current_app.logger.warning(
                 f"User:{username} | IP: {request.remote_addr} - Username or password is incorrect"
             )
             flash("Login failed. Invalid username or password.", "danger")
             return redirect(url_for("auth.login", next=unquote_plus(next_page)))
+        if password_hasher.needs_rehash(user.password_hash):
+            # Not set_password: the password itself is unchanged, so the user's
+            # other sessions should stay valid.
+            try:
+                user.password_hash = password_hasher.hash(form.password.data)
+            except HasherBusy:
+                # The password was already verified; retry the upgrade next time.
+                current_app.logger.warning(
+                    f"User:{username} | IP: {request.remote_addr} - Password hash upgrade skipped"
+                )
+            else:
+                db.session.commit()
+                current_app.logger.info(
+                    f"User:{username} | IP: {request.remote_addr} - Password hash upgraded"
+                )
         login_user(user)
         current_app.logger.info(
             f"User:{username} | IP: {request.remote_addr} - User successfully logged in"
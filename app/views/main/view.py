@@ -1,27 +1,52 @@
+import base64
+import hmac
+import mimetypes
 import os
+import threading
+import time
 from datetime import timedelta
+from urllib.parse import quote
 
+import sqlalchemy as sa
 from flask import (
+    Response,
+    abort,
     current_app,
     flash,
     g,
+    jsonify,
+    make_response,
     redirect,
     render_template,
     request,
+    send_from_directory,
     session,
+    stream_with_context,
     url_for,
 )
 from flask_login import current_user, login_required
 from werkzeug.utils import secure_filename
 
-from app import db
-from app.bin.utils import log_request
-from app.models import File, get_all_files
-from app.services.container import Container
-from app.services.index import IndexFile
+from app import db, limiter
+from app.bin.utils import conditional_response, log_request, set_content_disposition
+from app.models import File
+from app.services.catalog import Catalog
+from app.services.catalog.exceptions import DuplicateContent, FileAlreadyExists
+from app.services.container import snapshots
+from app.services.jobs import DELETE_JOB, delete_files, get_job, jobs
+from app.services.journal import ChangeJournal
+from app.services.upload import ChunkedUpload
+from app.services.upload.exceptions import UploadConflict, UploadError
+from app.viewmodels.main.container_viewmodel import ContainerViewModel
+from app.viewmodels.main.file_list_viewmodel import FileListViewModel
+from app.viewmodels.main.fleet_viewmodel import FleetViewModel
 from app.viewmodels.main.main_viewmodel import MainViewModel
 from app.views.main import bp
 
+# Live container event streams in this worker; see container_events.
+_open_streams = 0
+_open_streams_lock = threading.Lock()
+
 
 @bp.before_request
 def before_request():
@@ -40,6 +65,16 @@ def index():
     return render_template("main/main.html", **vm.to_dict())
 
 
+@bp.route("/files", methods=["GET"])
+@limiter.exempt  # Called for every table draw, i.e. on each page, sort and search.
+@login_required
+def list_files():
+    log_request()
+    vm = FileListViewModel()
+
+    return conditional_response(vm.etag(), vm.render)
+
+
 @bp.route("/file/<int:id>/delete", methods=["Delete"])
 @login_required
 def delete_file(id):
@@ -50,6 +85,88 @@ def delete_file(id):
     return ""
 
 
+@bp.route("/file/<int:id>/download", methods=["GET"], defaults={"as_attachment": True})
+@bp.route("/file/<int:id>/preview", methods=["GET"], defaults={"as_attachment": False})
+@limiter.exempt  # Resumed downloads and PDF viewers send one Range request per chunk.
+@login_required
+def download_file(id, as_attachment):
+    """Serve a catalogued file, for download or inline in the browser.
+
+    With FILE_ACCEL_REDIRECT_PREFIX set, nginx is told to send the file from
+    its internal location (X-Accel-Redirect) and the worker is free again right
+    away; nginx answers Range and conditional requests itself. Otherwise
+    send_from_directory handles Range, ETag and Last-Modified, and full
+    responses go out through gunicorn's sendfile() support.
+    """
+    log_request()
+    file = db.get_or_404(File, id)
+    prefix = current_app.config["FILE_ACCEL_REDIRECT_PREFIX"]
+    if prefix:
+        response = make_response("")
+        response.headers["X-Accel-Redirect"] = (
+            f"{prefix.rstrip('/')}/{quote(file.full_name)}"  # type: ignore
+        )
+        response.mimetype = (
+            mimetypes.guess_type(file.name)[0] or "application/octet-stream"
+        )
+        set_content_disposition(response, file.name, as_attachment)
+    else:
+        response = send_from_directory(
+            current_app.config["DATA_DIR"],
+            file.full_name,  # type: ignore
+            as_attachment=as_attachment,
+            download_name=file.name,
+            conditional=True,
+        )
+        # Werkzeug only sends it on 206s; PDF viewers look for it on the first
+        # response before switching to range requests.
+        response.headers.setdefault("Accept-Ranges", "bytes")
+    response.cache_control.private = True
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    return response
+
+
+@bp.route("/files/delete", methods=["POST"])
+@login_required
+def bulk_delete_files():
+    """Remove many files at once: the File rows go in one transaction, the
+    files themselves are unlinked by a background job whose summary is
+    available from job_status."""
+    log_request()
+    payload = request.get_json(silent=True)
+    ids = payload.get("ids") if isinstance(payload, dict) else None
+    if not isinstance(ids, list) or not all(
+        isinstance(id, int) and not isinstance(id, bool) for id in ids
+    ):
+        return jsonify({"error": "Expected a JSON body with a list of file ids."}), 400
+
+    removed = Catalog.from_config().remove_files(ids)
+    current_app.logger.info(
+        f"User:{current_user.username} - Removed {len(removed)} file(s) from DB"
+    )
+    if not current_app.config["DELETE_FILES_ENABLED"] or not removed:
+        return jsonify({"removed": len(removed), "job": None})
+
+    job, _ = jobs.submit(
+        DELETE_JOB,
+        current_user.username,
+        delete_files,
+        removed,
+        current_app.config["DELETE_WORKERS"],
+        merge=False,
+    )
+    return (
+        jsonify(
+            {
+                "removed": len(removed),
+                "job": job.id,
+                "status_url": url_for("main.job_status", job_id=job.id),
+            }
+        ),
+        202,
+    )
+
+
 @bp.route("/upload", methods=["GET"])
 @login_required
 def upload_modal():
@@ -59,7 +176,9 @@ def upload_modal():
         for extension in current_app.config["SUPPORTED_FILE_EXTENSIONS"]
     ]
     return render_template(
-        "main/_partials/upload.html", supported_extensions=supported_extensions
+        "main/_partials/upload.html",
+        supported_extensions=supported_extensions,
+        chunk_size=current_app.config["UPLOAD_CHUNK_SIZE"],
     )
 
 
@@ -72,7 +191,7 @@ def upload_files():
         for extension in current_app.config["SUPPORTED_FILE_EXTENSIONS"]
     }
     uploaded_files = request.files.getlist("file")
-    existing_files_names = [file.name for file in get_all_files()]
+    catalog = Catalog.from_config()
     for file in uploaded_files:
         filename = secure_filename(file.filename)  # type: ignore
         if filename != "":
@@ -80,28 +199,224 @@ def upload_files():
             if file_ext not in supported_extensions:
                 flash(f"Error: Unsupported file type for file '{filename}'.", "danger")
                 continue
-            if filename in existing_files_names:
+            if db.session.scalar(sa.select(File.id).where(File.full_name == filename)):
                 flash(
                     f"File '{filename}' already exists in directory. Please delete the existing file if you want to replace it.",
                     "warning",
                 )
                 continue
-            file.save(os.path.join(current_app.config["DATA_DIR"], filename))
+            part_file, content_hash = ChunkedUpload.save_stream(
+                current_app.config["DATA_DIR"], file.stream
+            )
+            try:
+                catalog.add_file(part_file, filename, content_hash)
+            except (DuplicateContent, FileAlreadyExists) as error:
+                flash(str(error), "warning")
+                continue
             flash(f"File '{filename}' uploaded successfully.", "success")
     return redirect(url_for("main.index"))
 
 
+def upload_response(body="", status=204, upload=None, **headers):
+    response = make_response(body, status)
+    response.headers["Tus-Resumable"] = "1.0.0"
+    response.headers["Cache-Control"] = "no-store"
+    if upload is not None:
+        response.headers["Upload-Offset"] = str(upload.offset)
+        response.headers["Upload-Length"] = str(upload.length)
+    response.headers.update(headers)
+    return response
+
+
+def parse_upload_metadata(header):
+    """Parse tus "Upload-Metadata": comma separated "key base64(value)" pairs."""
+    metadata = {}
+    for pair in (header or "").split(","):
+        key, _, value = pair.strip().partition(" ")
+        if key:
+            try:
+                metadata[key] = base64.b64decode(value).decode()
+            except (ValueError, UnicodeDecodeError):
+                raise UploadError(f"Malformed Upload-Metadata value for '{key}'.")
+    return metadata
+
+
+@bp.route("/upload/chunked", methods=["POST"])
+@login_required
+def create_chunked_upload():
+    log_request()
+    supported_extensions = {
+        f".{extension.removeprefix('.')}"
+        for extension in current_app.config["SUPPORTED_FILE_EXTENSIONS"]
+    }
+    data_dir = current_app.config["DATA_DIR"]
+    try:
+        metadata = parse_upload_metadata(request.headers.get("Upload-Metadata"))
+        filename = secure_filename(metadata.get("filename", ""))
+        if filename == "":
+            raise UploadError("Missing file name.")
+        if os.path.splitext(filename)[1] not in supported_extensions:
+            raise UploadError(f"Error: Unsupported file type for file '{filename}'.")
+        length = request.headers.get("Upload-Length", -1, type=int)
+        if length < 0:
+            raise UploadError("Missing Upload-Length header.")
+        if db.session.scalar(sa.select(File.id).where(File.full_name == filename)):
+            raise UploadConflict(
+                f"File '{filename}' already exists in directory. Please delete the existing file if you want to replace it."
+            )
+        ChunkedUpload.remove_expired(
+            data_dir, int(current_app.config["UPLOAD_EXPIRY_SECONDS"])
+        )
+        upload = ChunkedUpload.create(
+            data_dir,
+            filename,
+            length,
+            max_length=int(current_app.config["UPLOAD_MAX_FILE_SIZE"]),
+            checksum=metadata.get("checksum"),
+        )
+    except UploadError as error:
+        return upload_response(str(error), error.status_code)
+    current_app.logger.info(f"Started chunked upload {upload.id} for file '{filename}'")
+    return upload_response(
+        "",
+        201,
+        upload,
+        Location=url_for("main.chunked_upload", upload_id=upload.id),
+    )
+
+
+@bp.route("/upload/chunked/<upload_id>", methods=["HEAD", "PATCH", "DELETE"])
+@limiter.exempt
+@login_required
+def chunked_upload(upload_id):
+    data_dir = current_app.config["DATA_DIR"]
+    try:
+        upload = ChunkedUpload(data_dir, upload_id)
+        if request.method == "HEAD":
+            return upload_response(upload=upload)
+        if request.method == "DELETE":
+            log_request()
+            upload.abort()
+            return upload_response()
+
+        if request.content_type != "application/offset+octet-stream":
+            return upload_response("Unsupported Content-Type.", 415)
+        offset = request.headers.get("Upload-Offset", -1, type=int)
+        checksum = ChunkedUpload.parse_checksum(request.headers.get("Upload-Checksum"))
+        upload.append(request.stream, offset, checksum)
+        if upload.is_complete:
+            log_request()
+            try:
+                target = upload.finish(Catalog.from_config().add_file)
+            except (DuplicateContent, FileAlreadyExists) as error:
+                # Not 409, which tells the client its offset is stale.
+                return upload_response(str(error), 422)
+            current_app.logger.info(f"Finished chunked upload of file '{target.name}'")
+            return upload_response(**{"Upload-Offset": str(upload.length)})
+        return upload_response(upload=upload)
+    except UploadError as error:
+        return upload_response(str(error), error.status_code)
+
+
 @bp.route("/container", methods=["GET"])
 @login_required
 def container_modal():
     log_request()
-    container_minimum_uptime = current_app.config["MINIMUM_CONTAINER_UPTIME_SECONDS"]
-    index_minimum_uptime = current_app.config["MINIMUM_INDEX_UPTIME_SECONDS"]
-    return render_template(
-        "main/_partials/container.html",
-        container_name=current_app.config["CONTAINER_NAME"],
-        container_minimum_uptime=container_minimum_uptime,
-        index_minimum_uptime=index_minimum_uptime,
+    vm = ContainerViewModel()
+    return render_template("main/_partials/container.html", **vm.to_dict())
+
+
+@bp.route("/fleet", methods=["GET"])
+@login_required
+def fleet():
+    log_request()
+    vm = FleetViewModel()
+    return render_template("main/fleet.html", **vm.to_dict())
+
+
+@bp.route("/container/events", methods=["GET"])
+@limiter.exempt
+@login_required
+def container_events():
+    """Server-Sent Events stream for the container modal.
+
+    Sends every partial once on connect and afterwards only the ones whose
+    rendered HTML changed. The stream sleeps until the container snapshot
+    changes, which the Docker events subscriber reports right away, or at
+    most SSE_CHECK_INTERVAL_SECONDS; it then compares the view model's
+    fingerprint, which catches index flags, job progress from other workers
+    and the passing of time, and renders only when that moved. Each stream
+    holds a gunicorn thread, so it ends after SSE_MAX_STREAM_SECONDS and the
+    browser's EventSource reconnects, and at most SSE_MAX_STREAMS run at once
+    per worker. Beyond that the partials
+    are sent once and the client is told to reconnect after SSE_RETRY_SECONDS,
+    which turns extra modals into slow polling instead of using up the threads.
+    """
+    log_request()
+    vm = ContainerViewModel()
+    check_interval = float(current_app.config["SSE_CHECK_INTERVAL_SECONDS"])
+    heartbeat_interval = float(current_app.config["SSE_HEARTBEAT_SECONDS"])
+    max_stream_seconds = float(current_app.config["SSE_MAX_STREAM_SECONDS"])
+    max_streams = int(current_app.config["SSE_MAX_STREAMS"])
+    retry_ms = int(float(current_app.config["SSE_RETRY_SECONDS"]) * 1000)
+
+    def sse_message(event, data):
+        lines = "".join(f"data: {line}\n" for line in data.splitlines())
+        return f"event: {event}\n{lines}\n"
+
+    def acquire_stream():
+        global _open_streams
+        with _open_streams_lock:
+            if _open_streams >= max_streams:
+                return False
+            _open_streams += 1
+            return True
+
+    def release_stream():
+        global _open_streams
+        with _open_streams_lock:
+            _open_streams -= 1
+
+    @stream_with_context
+    def stream():
+        # Taken on the first iteration, so a response that is never sent does
+        # not keep a slot.
+        if not acquire_stream():
+            yield f"retry: {retry_ms}\n\n"
+            for event, html in vm.render_partials().items():
+                yield sse_message(event, html)
+            return
+        try:
+            yield "retry: 1000\n\n"
+            sent = {}
+            fingerprint = None
+            generation = snapshots.generation
+            started = last_message = time.monotonic()
+            while time.monotonic() - started < max_stream_seconds:
+                current = vm.fingerprint()
+                if current != fingerprint:
+                    fingerprint = current
+                    # The restart job is loaded again, not taken from the session.
+                    db.session.expire_all()
+                    for event, html in vm.render_partials().items():
+                        if sent.get(event) != html:
+                            sent[event] = html
+                            last_message = time.monotonic()
+                            yield sse_message(event, html)
+                if time.monotonic() - last_message >= heartbeat_interval:
+                    last_message = time.monotonic()
+                    yield ": heartbeat\n\n"
+                remaining = max_stream_seconds - (time.monotonic() - started)
+                generation = snapshots.wait(
+                    generation, max(0, min(check_interval, remaining))
+                )
+        finally:
+            release_stream()
+
+    return Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -109,92 +424,85 @@ def container_modal():
 @login_required
 def is_container_restartable():
     log_request()
-    container = Container(name=current_app.config["CONTAINER_NAME"])
-    index = IndexFile(
-        running_file_path=current_app.config["INDEX_RUNNING_FILE"],
-        complete_file_path=current_app.config["INDEX_COMPLETE_FILE"],
-    )
-    container_restartable = container.is_restartable(
-        must_be_up_for_seconds=current_app.config["MINIMUM_CONTAINER_UPTIME_SECONDS"]
-    )
-    index_restartable = index.is_restartable(
-        must_be_up_for_seconds=current_app.config["MINIMUM_INDEX_UPTIME_SECONDS"]
-    )
-    if container_restartable and index_restartable:
-        return render_template("main/_partials/container_restart_enabled.html")
-    elif container_restartable and not index_restartable:
-        button_text = "Waiting for index to complete..."
-        return render_template(
-            "main/_partials/container_restart_disabled.html", button_text=button_text
-        )
-    else:
-        button_text = "Waiting for container to start..."
-        return render_template(
-            "main/_partials/container_restart_disabled.html", button_text=button_text
-        )
+    vm = ContainerViewModel()
+    return vm.render_restart()
 
 
 @bp.route("/container/restart", methods=["POST"])
 @login_required
 def container_restart():
     log_request()
-    container = Container(name=current_app.config["CONTAINER_NAME"])
-    index = IndexFile(
-        running_file_path=current_app.config["INDEX_RUNNING_FILE"],
-        complete_file_path=current_app.config["INDEX_COMPLETE_FILE"],
-    )
-    container_restartable = container.is_restartable(
-        must_be_up_for_seconds=current_app.config["MINIMUM_CONTAINER_UPTIME_SECONDS"]
-    )
-    index_restartable = index.is_restartable(
-        must_be_up_for_seconds=current_app.config["MINIMUM_INDEX_UPTIME_SECONDS"]
-    )
-    if container_restartable and index_restartable:
-        index.delete_index_complete_flag()
-        container.restart(
-            must_be_up_for_seconds=current_app.config[
-                "MINIMUM_CONTAINER_UPTIME_SECONDS"
-            ]
+    vm = ContainerViewModel()
+    job = vm.restart_job()
+    if job is None or not job.is_active:
+        if not (vm.is_container_restartable() and vm.is_index_restartable()):
+            return ""
+        job, created = vm.submit_restart()
+        if created:
+            current_app.logger.info(
+                f"User:{current_user.username} - Restart job {job.id} submitted for container '{vm.container_name}'"
+            )
+    return vm.render_restart_job(job), 202
+
+
+@bp.route("/jobs/<job_id>", methods=["GET"])
+@login_required
+def job_status(job_id):
+    log_request()
+    job = get_job(job_id)
+    if job is None:
+        abort(404)
+    return jsonify(job.to_dict())
+
+
+@bp.route("/changes", methods=["GET"])
+@limiter.exempt
+def file_changes():
+    """Delta feed of the change journal: the changes after ?since=<sequence>,
+    oldest first. Clients keep the returned cursor and pass it as since on the
+    next call; more is true while there are further pages."""
+    log_request()
+    token = current_app.config["CHANGES_TOKEN"]
+    if not current_user.is_authenticated and not (
+        token
+        and hmac.compare_digest(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
         )
-    return render_template("main/_partials/container_restart_disabled.html")
+    ):
+        abort(401)
+    page_size = int(current_app.config["CHANGES_PAGE_SIZE"])
+    since = max(request.args.get("since", 0, type=int), 0)
+    limit = min(max(request.args.get("limit", page_size, type=int), 1), page_size)
+    changes, more = ChangeJournal.since(since, limit)
+    return jsonify(
+        {
+            "changes": [change.to_dict() for change in changes],
+            "cursor": changes[-1].sequence if changes else since,
+            "latest": ChangeJournal.latest_sequence(),
+            "more": more,
+        }
+    )
 
 
 @bp.route("/container/status", methods=["GET"])
 @login_required
 def container_status():
     log_request()
-    container = Container(name=current_app.config["CONTAINER_NAME"])
-    return render_template(
-        "main/_partials/container_status.html", container_status=container.status
-    )
+    vm = ContainerViewModel()
+    return conditional_response(vm.status_etag(), vm.render_status)
 
 
 @bp.route("/container/uptime", methods=["GET"])
 @login_required
 def container_uptime():
     log_request()
-    container = Container(name=current_app.config["CONTAINER_NAME"])
-    return render_template(
-        "main/_partials/container_uptime.html",
-        container_uptime=container.uptime[1],
-    )
+    vm = ContainerViewModel()
+    return conditional_response(vm.uptime_etag(), vm.render_uptime)
 
 
 @bp.route("/container/index-status", methods=["GET"])
 @login_required
 def container_index_status():
     log_request()
-    index = IndexFile(
-        running_file_path=current_app.config["INDEX_RUNNING_FILE"],
-        complete_file_path=current_app.config["INDEX_COMPLETE_FILE"],
-    )
-    if index.is_running():
-        status = f"Running ({index.running_status()[1]})"
-    elif index.is_complete():
-        status = f"Complete ({index.complete_status()[1]})"
-    else:
-        status = "Unknown"
-    return render_template(
-        "main/_partials/container_index.html",
-        index_status=status,
-    )
+    vm = ContainerViewModel()
+    return conditional_response(vm.index_status_etag(), vm.render_index_status)
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+bp = Blueprint("metrics", __name__)
+
+from app.views.metrics import view  # noqa: E402,F401
@@ -0,0 +1,30 @@
+import hmac
+
+from flask import Response, abort, current_app, request
+from flask_login import current_user
+
+from app import limiter
+from app.bin.utils import log_request
+from app.services.metrics import metrics
+from app.views.metrics import bp
+
+
+@bp.route("/metrics", methods=["GET"])
+@limiter.exempt
+def metrics_endpoint():
+    """Prometheus scrape endpoint, merged over all gunicorn workers.
+
+    Open to logged-in users, or to scrapers sending "Authorization: Bearer
+    <METRICS_TOKEN>". Kept out of the main blueprint so scrapes do not
+    refresh (and set) a session cookie.
+    """
+    log_request()
+    token = current_app.config["METRICS_TOKEN"]
+    if not current_user.is_authenticated and not (
+        token
+        and hmac.compare_digest(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        )
+    ):
+        abort(401)
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,70 @@
+"""Measure how catalog sync and the index page scale with the size of DATA_DIR.
+
+Usage: python -m benchmarks.catalog_sync [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import shutil
+from pathlib import Path
+
+from tabulate import tabulate
+
+from benchmarks.common import login, make_app, make_data_files, make_workspace, timed
+
+
+def run(size, repeat):
+    workspace, data_dir = make_workspace()
+    try:
+        make_data_files(data_dir, size)
+        app = make_app(workspace, data_dir)
+
+        from app.services.catalog import Catalog
+
+        with app.app_context():
+            catalog = Catalog.from_config()
+            initial_sync = timed(catalog.sync)[0]
+            unchanged_sync = min(timed(catalog.sync, repeat=repeat))
+
+            churn = max(1, size // 100)
+            for file in sorted(Path(data_dir).iterdir())[:churn]:
+                file.unlink()
+            for i in range(churn):
+                (Path(data_dir) / f"churn-{i:06d}.pdf").write_bytes(b"1")
+            churn_sync = timed(catalog.sync)[0]
+
+        client = login(app.test_client())
+        index_page = min(timed(lambda: client.get("/"), repeat=repeat))
+        return [size, initial_sync, unchanged_sync, churn_sync, index_page]
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Catalog sync benchmark",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    return parser
+
+
+if __name__ == "__main__":
+    args = parse_args().parse_args()
+    results = [run(size, args.repeat) for size in args.sizes]
+    print(
+        tabulate(
+            results,
+            headers=[
+                "Files",
+                "Initial sync ms",
+                "Unchanged sync ms",
+                "1% churn sync ms",
+                "Index page ms",
+            ],
+            floatfmt=".1f",
+            tablefmt="rounded_outline",
+        )
+    )
@@ -0,0 +1,117 @@
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import flask_migrate
+import sqlalchemy as sa
+
+from config import Config
+
+BASEDIR = Path(__file__).resolve().parent.parent
+BENCHMARK_USERNAME = "benchmark"
+BENCHMARK_PASSWORD = "benchmark-password"
+
+
+class BenchmarkConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    RATELIMIT_ENABLED = False
+    LOG_TO_STDOUT = False
+
+
+def make_workspace():
+    """Create a throwaway directory holding a data directory and an SQLite DB."""
+    workspace = Path(tempfile.mkdtemp(prefix="pai-admin-bench-"))
+    data_dir = workspace / "data"
+    data_dir.mkdir()
+    return workspace, data_dir
+
+
+def make_data_files(data_dir, count, extensions=(".pdf", ".docx", ".txt"), size=1024):
+    payload = b"0" * size
+    for i in range(count):
+        (
+            Path(data_dir) / f"document-{i:06d}{extensions[i % len(extensions)]}"
+        ).write_bytes(payload)
+
+
+def make_app(workspace, data_dir, setup=True, **overrides):
+    from app import create_app, db
+    from app.models import User
+
+    attributes = {
+        "SECRET_KEY": "benchmark",
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{workspace / 'app.db'}",
+        "DATA_DIR": str(data_dir),
+        "INDEX_RUNNING_FILE": str(workspace / "index.running"),
+        "INDEX_COMPLETE_FILE": str(workspace / "index.complete"),
+        **overrides,
+    }
+    config_class = type("WorkspaceConfig", (BenchmarkConfig,), attributes)
+
+    cwd = os.getcwd()
+    os.chdir(workspace)
+    try:
+        app = create_app(config_class)
+    finally:
+        os.chdir(cwd)
+    if not setup:
+        return app
+    with app.app_context():
+        flask_migrate.upgrade(directory=str(BASEDIR / "migrations"))
+        user = User(username=BENCHMARK_USERNAME, email="benchmark@example.com")
+        user.set_password(BENCHMARK_PASSWORD)
+        db.session.add(user)
+        db.session.commit()
+    return app
+
+
+def login(client):
+    response = client.post(
+        "/login",
+        data={"username": BENCHMARK_USERNAME, "password": BENCHMARK_PASSWORD},
+    )
+    assert response.status_code == 302, response.status_code
+    return client
+
+
+def timed(func, repeat=1):
+    """Call func repeat times and return the list of durations in milliseconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def summarize(durations):
+    ordered = sorted(durations)
+    p99_index = min(len(ordered) - 1, round(0.99 * (len(ordered) - 1)))
+    return {
+        "p50": statistics.median(ordered),
+        "p99": ordered[p99_index],
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+
+class QueryCounter:
+    """Counts SQL statements executed on any engine while it is active."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    @contextmanager
+    def active(self):
+        sa.event.listen(sa.engine.Engine, "after_cursor_execute", self)
+        try:
+            yield self
+        finally:
+            sa.event.remove(sa.engine.Engine, "after_cursor_execute", self)
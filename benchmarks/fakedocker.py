@@ -0,0 +1,200 @@
+"""A local stand-in for the Docker Engine API, enough for pai-admin's calls.
+
+Serves version, container inspect, start/stop/restart and the events stream
+over plain HTTP with a configurable per-call latency, and counts calls by
+operation so benchmarks can report Docker API calls per request.
+
+Usage from a benchmark:
+
+    with FakeDockerDaemon(latency=0.01) as daemon:
+        os.environ["DOCKER_HOST"] = daemon.url
+        ...
+        daemon.calls  # Counter of operation -> number of calls
+"""
+
+import json
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+CONTAINER_PATH = re.compile(
+    r"/containers/(?P<name>[^/]+)/(?P<action>json|start|stop|restart)$"
+)
+
+
+def utc_now():
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class FakeContainer:
+    def __init__(self, name) -> None:
+        self.name = name
+        self.id = f"{abs(hash(name)):016x}" * 4
+        self.running = True
+        self.started_at = utc_now()
+        self.restart_count = 0
+
+    def inspect(self):
+        return {
+            "Id": self.id,
+            "Name": f"/{self.name}",
+            "RestartCount": self.restart_count,
+            "State": {
+                "Status": "running" if self.running else "exited",
+                "Running": self.running,
+                "StartedAt": self.started_at,
+            },
+        }
+
+
+class FakeDockerDaemon:
+    def __init__(self, latency=0.0, containers=("pai",), restart_seconds=0.0) -> None:
+        self.latency = float(latency)
+        self.restart_seconds = float(restart_seconds)
+        self.containers = {name: FakeContainer(name) for name in containers}
+        self.calls = Counter()
+        self.events = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler_class())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"tcp://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    def record(self, operation):
+        with self._lock:
+            self.calls[operation] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def container(self, name_or_id):
+        """Look a container up by name or id, as the Docker API does."""
+        container = self.containers.get(name_or_id.lstrip("/"))
+        if container is None:
+            container = next(
+                (c for c in self.containers.values() if c.id == name_or_id), None
+            )
+        return container
+
+    def emit(self, container, action):
+        self.events.append(
+            {
+                "Type": "container",
+                "Action": action,
+                "status": action,
+                "id": container.id,
+                "Actor": {"ID": container.id, "Attributes": {"name": container.name}},
+                "time": int(time.time()),
+            }
+        )
+
+    def act(self, container, action):
+        if action in ("stop", "restart") and container.running:
+            container.running = False
+            self.emit(container, "die")
+        if action in ("start", "restart"):
+            time.sleep(self.restart_seconds)
+            container.running = True
+            container.started_at = utc_now()
+            container.restart_count += action == "restart"
+            self.emit(container, "start")
+
+    def handler_class(self):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; without this every response
+            # waits on a delayed ACK.
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, body, status=200):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def send_empty(self, status=204):
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path.endswith("/version") or url.path.endswith("/_ping"):
+                    daemon.record("version")
+                    return self.send_json({"ApiVersion": "1.41", "Version": "24.0.0"})
+                if url.path.endswith("/events"):
+                    daemon.record("events")
+                    return self.stream_events(parse_qs(url.query))
+                match = CONTAINER_PATH.search(url.path)
+                if match and match["action"] == "json":
+                    daemon.record("inspect")
+                    container = daemon.container(match["name"])
+                    if container is None:
+                        return self.send_json({"message": "No such container"}, 404)
+                    return self.send_json(container.inspect())
+                self.send_json({"message": "page not found"}, 404)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                match = CONTAINER_PATH.search(urlsplit(self.path).path)
+                if match is None or match["action"] == "json":
+                    return self.send_json({"message": "page not found"}, 404)
+                daemon.record(match["action"])
+                container = daemon.container(match["name"])
+                if container is None:
+                    return self.send_json({"message": "No such container"}, 404)
+                daemon.act(container, match["action"])
+                self.send_empty()
+
+            def stream_events(self, query):
+                until = float(query.get("until", ["inf"])[0])
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                seen = len(daemon.events)
+                try:
+                    while time.time() < until:
+                        for event in daemon.events[seen:]:
+                            line = (json.dumps(event) + "\n").encode()
+                            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                            seen += 1
+                        self.wfile.flush()
+                        time.sleep(0.05)
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
@@ -0,0 +1,108 @@
+"""Measure the per-request overhead of the rate limiter for each storage backend.
+
+Every row times GET / (a redirect to the login page, so the view itself costs
+next to nothing) with the limiter disabled, with per-process memory storage and
+with the shared SQLite storage. The contention columns hit the storage directly
+from several processes at once, as gunicorn workers would.
+
+Usage: python -m benchmarks.ratelimit [--requests 2000] [--processes 4]
+"""
+
+import argparse
+import multiprocessing
+import shutil
+import time
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import STRATEGIES
+from tabulate import tabulate
+
+from app.bin.ratelimit import SQLiteStorage  # noqa: F401  registers "sqlite://"
+from benchmarks.common import make_app, make_workspace, summarize, timed
+
+BACKENDS = [
+    ("disabled", None, None),
+    ("memory", "memory://", "fixed-window"),
+    ("memory", "memory://", "moving-window"),
+    ("sqlite", "sqlite:///{workspace}/ratelimit.db", "fixed-window"),
+    ("sqlite", "sqlite:///{workspace}/ratelimit.db", "moving-window"),
+]
+# High enough that no request is rejected; the point is the bookkeeping cost.
+LIMIT = "1000000 per hour"
+
+
+def hit_storage(uri, strategy, count, key):
+    limiter = STRATEGIES[strategy](storage_from_string(uri))
+    limit = parse(LIMIT)
+    start = time.perf_counter()
+    for _ in range(count):
+        limiter.hit(limit, key)
+    return time.perf_counter() - start
+
+
+def contention(uri, strategy, processes, count):
+    """Hits per second with processes hitting one key concurrently."""
+    if uri.startswith("memory"):
+        return None
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes) as pool:
+        durations = pool.starmap(
+            hit_storage, [(uri, strategy, count, "shared")] * processes
+        )
+    return processes * count / max(durations)
+
+
+def run(name, uri, strategy, requests, processes):
+    workspace, data_dir = make_workspace()
+    try:
+        overrides = {"RATELIMIT_ENABLED": uri is not None, "RATELIMIT_DEFAULT": LIMIT}
+        if uri is not None:
+            uri = uri.format(workspace=workspace)
+            overrides.update(RATELIMIT_STORAGE_URI=uri, RATELIMIT_STRATEGY=strategy)
+        app = make_app(workspace, data_dir, **overrides)
+        client = app.test_client()
+        timed(lambda: client.get("/"), repeat=50)
+        stats = summarize(timed(lambda: client.get("/"), repeat=requests))
+        shared = contention(uri, strategy, processes, requests) if uri else None
+        return [
+            name,
+            strategy or "-",
+            stats["p50"],
+            stats["p99"],
+            f"{shared:.0f}" if shared is not None else "-",
+        ]
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Rate limiter overhead benchmark",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--processes", type=int, default=4)
+    return parser
+
+
+if __name__ == "__main__":
+    args = parse_args().parse_args()
+    results = [
+        run(name, uri, strategy, args.requests, args.processes)
+        for name, uri, strategy in BACKENDS
+    ]
+    print(
+        tabulate(
+            results,
+            headers=[
+                "Storage",
+                "Strategy",
+                "Request p50 ms",
+                "Request p99 ms",
+                f"Hits/s with {args.processes} processes",
+            ],
+            floatfmt=".3f",
+            tablefmt="rounded_outline",
+        )
+    )
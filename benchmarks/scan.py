@@ -0,0 +1,106 @@
+"""Compare directory scans of a sharded DATA_DIR.
+
+Generates a tree of shards/<xx>/<yy>/document-N.<ext> files and lists it with a
+sequential os.walk plus stat() per file (what a straightforward recursive scan
+costs) and with the catalog scanner at several worker counts. --latency adds a
+delay to every directory listing, standing in for a slow network mount where
+the round trips, not the CPU, dominate.
+
+Usage: python -m benchmarks.scan [--files 100000] [--shards 16] [--latency 0.005]
+"""
+
+import argparse
+import os
+import shutil
+import time
+
+from tabulate import tabulate
+
+from app.services.catalog.scanner import scan_tree
+from benchmarks.common import make_workspace
+
+EXTENSIONS = {".pdf", ".docx", ".txt"}
+
+
+def make_tree(data_dir, files, shards):
+    payload = b"0" * 128
+    extensions = sorted(EXTENSIONS)
+    for i in range(files):
+        directory = data_dir / f"{i % shards:02x}" / f"{i // shards % shards:02x}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"document-{i:06d}{extensions[i % len(extensions)]}").write_bytes(
+            payload
+        )
+
+
+def walk(data_dir):
+    found = 0
+    for directory, _, names in os.walk(data_dir):
+        for name in names:
+            if os.path.splitext(name)[1] in EXTENSIONS:
+                os.stat(os.path.join(directory, name))
+                found += 1
+    return found
+
+
+def with_latency(latency):
+    """Make every os.scandir call (os.walk uses it too) wait latency seconds."""
+    scandir = os.scandir
+
+    def slow_scandir(path="."):
+        time.sleep(latency)
+        return scandir(path)
+
+    os.scandir = slow_scandir
+
+
+def timed(function):
+    start = time.perf_counter()
+    found = function()
+    return found, (time.perf_counter() - start) * 1000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="DATA_DIR scan benchmark",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.005,
+        help="Seconds added to every directory listing",
+    )
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 4, 8, 16])
+    return parser
+
+
+if __name__ == "__main__":
+    args = parse_args().parse_args()
+    workspace, data_dir = make_workspace()
+    try:
+        make_tree(data_dir, args.files, args.shards)
+        if args.latency:
+            with_latency(args.latency)
+        results = [["os.walk + stat", *timed(lambda: walk(data_dir))]]
+        for workers in args.workers:
+            results.append(
+                [
+                    f"scan_tree, {workers} workers",
+                    *timed(
+                        lambda: sum(1 for _ in scan_tree(data_dir, EXTENSIONS, workers))
+                    ),
+                ]
+            )
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+    print(
+        tabulate(
+            results,
+            headers=["Scanner", "Files found", "ms"],
+            floatfmt=".1f",
+            tablefmt="rounded_outline",
+        )
+    )
@@ -0,0 +1,120 @@
+"""Compare SQLite write throughput with and without the SQLite profile.
+
+"default" is a plain pysqlite connection (rollback journal, synchronous=FULL);
+"profile" is the built-in profile (WAL, synchronous=NORMAL, busy_timeout, mmap,
+pooled connections). For each it measures single-process commits per second,
+commits per second and "database is locked" errors with several processes
+writing and reading at once, and the time of an initial catalog sync.
+
+Usage: python -m benchmarks.sqlite_writes [--commits 500] [--processes 4]
+"""
+
+import argparse
+import multiprocessing
+import shutil
+import time
+
+from sqlalchemy.exc import OperationalError
+from tabulate import tabulate
+
+from benchmarks.common import make_app, make_data_files, make_workspace
+
+PROFILES = {"default": False, "profile": True}
+
+
+def write_rows(workspace, data_dir, profile_enabled, prefix, commits):
+    """Commit one new File row at a time, reading the row count in between.
+
+    Returns (elapsed seconds, committed, lock errors).
+    """
+    from app import db
+    from app.models import File
+
+    app = make_app(
+        workspace, data_dir, setup=False, SQLITE_PROFILE_ENABLED=profile_enabled
+    )
+    committed = errors = 0
+    with app.app_context():
+        start = time.perf_counter()
+        for i in range(commits):
+            try:
+                db.session.scalar(db.select(db.func.count(File.id)))
+                db.session.add(
+                    File(
+                        name=f"{prefix}-{i:06d}.pdf",
+                        full_name=f"{prefix}-{i:06d}.pdf",
+                        extension=".pdf",
+                        size=i,
+                    )
+                )
+                db.session.commit()
+                committed += 1
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+        return time.perf_counter() - start, committed, errors
+
+
+def run(name, profile_enabled, args):
+    workspace, data_dir = make_workspace()
+    try:
+        make_data_files(data_dir, args.sync_files)
+        app = make_app(workspace, data_dir, SQLITE_PROFILE_ENABLED=profile_enabled)
+
+        from app.services.catalog import Catalog
+
+        with app.app_context():
+            start = time.perf_counter()
+            Catalog.from_config().sync()
+            sync_ms = (time.perf_counter() - start) * 1000
+
+        elapsed, committed, _ = write_rows(
+            workspace, data_dir, profile_enabled, "single", args.commits
+        )
+        single = committed / elapsed
+
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.processes) as pool:
+            results = pool.starmap(
+                write_rows,
+                [
+                    (workspace, data_dir, profile_enabled, f"worker{i}", args.commits)
+                    for i in range(args.processes)
+                ],
+            )
+        elapsed = max(result[0] for result in results)
+        concurrent = sum(result[1] for result in results) / elapsed
+        errors = sum(result[2] for result in results)
+        return [name, single, concurrent, errors, sync_ms]
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="SQLite write throughput benchmark",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--commits", type=int, default=500)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--sync-files", type=int, default=10_000)
+    return parser
+
+
+if __name__ == "__main__":
+    args = parse_args().parse_args()
+    results = [run(name, enabled, args) for name, enabled in PROFILES.items()]
+    print(
+        tabulate(
+            results,
+            headers=[
+                "SQLite settings",
+                "Commits/s (1 process)",
+                f"Commits/s ({args.processes} processes)",
+                "Lock errors",
+                f"Sync of {args.sync_files} files ms",
+            ],
+            floatfmt=".1f",
+            tablefmt="rounded_outline",
+        )
+    )
@@ -0,0 +1,279 @@
+"""Benchmark the main request paths against synthetic data and a fake Docker daemon.
+
+For every DATA_DIR size this generates a directory of mixed file types
+(including unsupported ones the catalog has to skip), starts the app against
+a local Docker API stand-in with the given latency, and times each scenario:
+the index page, the file table, uploads, deletes and every container partial.
+Each row reports p50/p99 latency plus SQL statements and Docker API calls per
+request.
+
+Results are written to benchmarks/results/<timestamp>.json; pass --compare
+with an earlier file to see the change per scenario.
+
+Usage: python -m benchmarks.suite [--sizes 1000 10000 100000] [--latency 0.005]
+       python -m benchmarks.suite --compare benchmarks/results/<earlier>.json
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import shutil
+import subprocess
+from datetime import datetime, timezone
+from itertools import count
+from pathlib import Path
+
+from tabulate import tabulate
+
+from benchmarks.common import (
+    BASEDIR,
+    QueryCounter,
+    login,
+    make_app,
+    make_data_files,
+    make_workspace,
+    summarize,
+    timed,
+)
+from benchmarks.fakedocker import FakeDockerDaemon
+
+RESULTS_DIR = BASEDIR / "benchmarks" / "results"
+EXTENSIONS = (".pdf", ".docx", ".txt", ".doc", ".jpg")
+CONTAINER_NAME = "pai"
+
+
+def scenarios(app, client):
+    """Return {name: callable} of the requests to time, each one request."""
+    from app import db
+    from app.models import File
+
+    uploads = count()
+    chunked_uploads = count()
+
+    def upload():
+        i = next(uploads)
+        data = {
+            "file": (
+                io.BytesIO(f"upload {i}".encode() * 64),
+                f"bench-upload-{i:06d}.pdf",
+            )
+        }
+        response = client.post("/upload", data=data, content_type="multipart/form-data")
+        assert response.status_code == 302, response.status_code
+
+    def chunked_upload():
+        i = next(chunked_uploads)
+        body = f"chunked upload {i}".encode() * 64
+        filename = f"bench-chunked-{i:06d}.pdf".encode()
+        response = client.post(
+            "/upload/chunked",
+            headers={
+                "Upload-Length": str(len(body)),
+                "Upload-Metadata": f"filename {base64.b64encode(filename).decode()}",
+            },
+        )
+        assert response.status_code == 201, response.status_code
+        response = client.patch(
+            response.headers["Location"],
+            data=body,
+            headers={
+                "Upload-Offset": "0",
+                "Content-Type": "application/offset+octet-stream",
+            },
+        )
+        assert response.status_code == 204, response.status_code
+
+    def delete():
+        with app.app_context():
+            id = db.session.scalar(db.select(File.id).order_by(File.id.desc()).limit(1))
+        response = client.delete(f"/file/{id}/delete")
+        assert response.status_code == 200, response.status_code
+
+    def get(url):
+        def request():
+            response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+
+        return request
+
+    return {
+        "index page": get("/"),
+        "file table": get(
+            "/files?draw=1&start=0&length=25&order[0][column]=1&order[0][dir]=asc"
+        ),
+        "file search": get(
+            "/files?draw=1&start=0&length=25&search[value]=document-0001"
+        ),
+        "upload": upload,
+        "chunked upload": chunked_upload,
+        "delete": delete,
+        "container modal": get("/container"),
+        "container status": get("/container/status"),
+        "container uptime": get("/container/uptime"),
+        "container index status": get("/container/index-status"),
+        "container restartable": get("/container/restartable"),
+        "fleet": get("/fleet"),
+    }
+
+
+def run(size, daemon, args):
+    workspace, data_dir = make_workspace()
+    try:
+        make_data_files(data_dir, size, extensions=EXTENSIONS)
+        app = make_app(
+            workspace,
+            data_dir,
+            CONTAINER_NAME=CONTAINER_NAME,
+            CONTAINER_CACHE_TTL_SECONDS=args.container_cache_ttl,
+            DELETE_FILES_ENABLED=True,
+            WATCHER_ENABLED=False,
+        )
+        client = login(app.test_client())
+        # The first index page load syncs the catalog with DATA_DIR.
+        client.get("/")
+
+        rows = []
+        for name, request in scenarios(app, client).items():
+            request()
+            daemon.reset_calls()
+            with QueryCounter().active() as counter:
+                durations = timed(request, repeat=args.repeat)
+                queries = counter.count
+            docker_calls = sum(daemon.calls.values())
+            stats = summarize(durations)
+            rows.append(
+                {
+                    "size": size,
+                    "scenario": name,
+                    "p50": stats["p50"],
+                    "p99": stats["p99"],
+                    "queries": queries / args.repeat,
+                    "docker_calls": docker_calls / args.repeat,
+                }
+            )
+        return rows
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASEDIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(results, args):
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    created = datetime.now(timezone.utc)
+    path = RESULTS_DIR / f"{created.strftime('%Y%m%dT%H%M%SZ')}.json"
+    path.write_text(
+        json.dumps(
+            {
+                "created": created.isoformat(),
+                "revision": git_revision(),
+                "settings": {
+                    "sizes": args.sizes,
+                    "repeat": args.repeat,
+                    "latency": args.latency,
+                    "container_cache_ttl": args.container_cache_ttl,
+                },
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    return path
+
+
+def change(current, previous):
+    if not previous:
+        return "-"
+    return f"{(current - previous) / previous * 100:+.0f}%"
+
+
+def print_results(results, baseline=None):
+    previous = {
+        (row["size"], row["scenario"]): row
+        for row in (baseline or {}).get("results", [])
+    }
+    table = []
+    for row in results:
+        line = [
+            row["size"],
+            row["scenario"],
+            row["p50"],
+            row["p99"],
+            row["queries"],
+            row["docker_calls"],
+        ]
+        if baseline is not None:
+            old = previous.get((row["size"], row["scenario"]))
+            line += [
+                change(row["p50"], old and old["p50"]),
+                change(row["p99"], old and old["p99"]),
+            ]
+        table.append(line)
+    headers = [
+        "Files",
+        "Scenario",
+        "p50 ms",
+        "p99 ms",
+        "Queries/req",
+        "Docker calls/req",
+    ]
+    if baseline is not None:
+        headers += [
+            f"p50 vs {baseline.get('revision') or 'baseline'}",
+            f"p99 vs {baseline.get('revision') or 'baseline'}",
+        ]
+    print(tabulate(table, headers=headers, floatfmt=".2f", tablefmt="rounded_outline"))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="pai-admin benchmark suite",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.005,
+        help="Seconds the fake Docker daemon takes per API call",
+    )
+    parser.add_argument(
+        "--container-cache-ttl",
+        type=float,
+        default=0,
+        help="CONTAINER_CACHE_TTL_SECONDS; 0 makes every partial call Docker",
+    )
+    parser.add_argument(
+        "--compare", type=Path, help="Earlier results file to compare with"
+    )
+    parser.add_argument(
+        "--no-save", action="store_true", help="Do not store the results"
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    args = parse_args().parse_args()
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    with FakeDockerDaemon(latency=args.latency, containers=[CONTAINER_NAME]) as daemon:
+        os.environ["DOCKER_HOST"] = daemon.url
+        results = [row for size in args.sizes for row in run(size, daemon, args)]
+    print_results(results, baseline)
+    if not args.no_save:
+        print(f"Results saved to {save(results, args)}")
@@ -11,21 +11,153 @@ class Config:
     SITE_NAME = "PAI Admin"
     DEFAULT_TITLE = "PAI Admin"
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
+    # Connection settings applied when DATABASE_URL is an SQLite file. WAL needs
+    # the database on a local filesystem (not NFS/SMB).
+    SQLITE_PROFILE_ENABLED = (
+        True
+        if os.environ.get("SQLITE_PROFILE_ENABLED", "True").lower() == "true"
+        else False
+    )
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 15000)
+    SQLITE_MMAP_SIZE = os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+    SQLITE_POOL_SIZE = os.environ.get("SQLITE_POOL_SIZE", 12)
+    SQLITE_MAX_OVERFLOW = os.environ.get("SQLITE_MAX_OVERFLOW", 8)
+    # Werkzeug hash method, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000".
+    # Stored hashes made with other settings are upgraded on the next login.
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_WORKERS = os.environ.get("PASSWORD_HASH_WORKERS", 1)
+    PASSWORD_HASH_MAX_QUEUE = os.environ.get("PASSWORD_HASH_MAX_QUEUE", 4)
+    PASSWORD_HASH_TIMEOUT_SECONDS = os.environ.get("PASSWORD_HASH_TIMEOUT_SECONDS", 10)
+    USER_CACHE_SIZE = os.environ.get("USER_CACHE_SIZE", 128)
+    USER_CACHE_TTL_SECONDS = os.environ.get("USER_CACHE_TTL_SECONDS", 30)
     LOG_TO_STDOUT = (
         True if os.environ.get("LOG_TO_STDOUT", "True").lower() == "true" else False
     )
+    # "text" or "json" (one JSON object per line).
+    LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+    LOG_MAX_BYTES = os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024)
+    LOG_BACKUP_COUNT = os.environ.get("LOG_BACKUP_COUNT", 10)
+    # JSON-lines access log (logs/access.log, or stdout) with duration, status,
+    # user and route of every request.
+    ACCESS_LOG_ENABLED = (
+        True
+        if os.environ.get("ACCESS_LOG_ENABLED", "False").lower() == "true"
+        else False
+    )
     SUPPORTED_FILE_EXTENSIONS = ["pdf", "doc", "docx", "txt"]
     DATA_DIR = os.environ.get("DATA_DIR")
+    HASH_WORKERS = os.environ.get("HASH_WORKERS", 4)
+    # Files in subdirectories of DATA_DIR are catalogued too (dot directories
+    # are skipped); SCAN_WORKERS directories are listed at the same time.
+    SCAN_RECURSIVE = (
+        True if os.environ.get("SCAN_RECURSIVE", "True").lower() == "true" else False
+    )
+    SCAN_WORKERS = os.environ.get("SCAN_WORKERS", 8)
+    # Every file added, replaced or deleted is journaled. An indexer reads the
+    # changes after its last checkpoint from /changes, or from this JSON-lines
+    # file in DATA_DIR (leave empty to not write it).
+    CHANGE_MANIFEST_NAME = os.environ.get(
+        "CHANGE_MANIFEST_NAME", ".pai-admin-changes.jsonl"
+    )
+    # If set, /changes accepts "Authorization: Bearer <CHANGES_TOKEN>" instead
+    # of a logged-in session.
+    CHANGES_TOKEN = os.environ.get("CHANGES_TOKEN", "")
+    CHANGES_PAGE_SIZE = os.environ.get("CHANGES_PAGE_SIZE", 1000)
+    # What to do with an upload whose content is already in DATA_DIR under another
+    # name: "reject" it, "link" it to the existing file, or "allow" a second copy.
+    DUPLICATE_CONTENT_POLICY = os.environ.get("DUPLICATE_CONTENT_POLICY", "reject")
+    FILE_SEARCH_MODE = os.environ.get("FILE_SEARCH_MODE", "substring")
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024))
+    UPLOAD_MAX_FILE_SIZE = os.environ.get("UPLOAD_MAX_FILE_SIZE", 20 * 1024**3)
+    UPLOAD_EXPIRY_SECONDS = os.environ.get("UPLOAD_EXPIRY_SECONDS", 24 * 60 * 60)
     DELETE_FILES_ENABLED = (
         True
         if os.environ.get("DELETE_FILES_ENABLED", "False").lower() == "true"
         else False
     )
+    DELETE_WORKERS = os.environ.get("DELETE_WORKERS", 4)
+    # Behind nginx: an internal location that serves DATA_DIR, e.g. "/protected-data"
+    # with "internal; alias <DATA_DIR>/;". Downloads are then sent by nginx.
+    FILE_ACCEL_REDIRECT_PREFIX = os.environ.get("FILE_ACCEL_REDIRECT_PREFIX", "")
     CONTAINER_NAME = os.environ.get("CONTAINER_NAME")
+    # JSON list of {"name", "index_running_file", "index_complete_file",
+    # "data_dir"}; defaults to the single CONTAINER_NAME container. Only the
+    # container whose data_dir is DATA_DIR has its files managed here; the
+    # others can be restarted and monitored, not browsed.
+    MANAGED_CONTAINERS = os.environ.get("MANAGED_CONTAINERS", "")
+    FLEET_MAX_WORKERS = os.environ.get("FLEET_MAX_WORKERS", 8)
+    FLEET_TIMEOUT_SECONDS = os.environ.get("FLEET_TIMEOUT_SECONDS", 3)
+    CONTAINER_CACHE_TTL_SECONDS = os.environ.get("CONTAINER_CACHE_TTL_SECONDS", 5)
+    CONTAINER_EVENTS_ENABLED = (
+        True
+        if os.environ.get("CONTAINER_EVENTS_ENABLED", "True").lower() == "true"
+        else False
+    )
+    CONTAINER_RECONCILE_SECONDS = os.environ.get("CONTAINER_RECONCILE_SECONDS", 60)
     INDEX_RUNNING_FILE = os.environ.get("INDEX_RUNNING_FILE")
     INDEX_COMPLETE_FILE = os.environ.get("INDEX_COMPLETE_FILE")
     MINIMUM_CONTAINER_UPTIME_SECONDS = os.environ.get(
         "MINIMUM_CONTAINER_UPTIME_SECONDS", 300
     )
     MINIMUM_INDEX_UPTIME_SECONDS = os.environ.get("MINIMUM_INDEX_UPTIME_SECONDS", 300)
+    JOB_WORKERS = os.environ.get("JOB_WORKERS", 2)
+    JOB_STALE_SECONDS = os.environ.get("JOB_STALE_SECONDS", 6 * 60 * 60)
+    RESTART_POLL_SECONDS = os.environ.get("RESTART_POLL_SECONDS", 2)
+    # Restart the container by itself once uploads and deletes have been quiet
+    # for AUTO_REINDEX_QUIET_SECONDS, so a burst of changes is indexed once.
+    AUTO_REINDEX_ENABLED = (
+        True
+        if os.environ.get("AUTO_REINDEX_ENABLED", "False").lower() == "true"
+        else False
+    )
+    AUTO_REINDEX_QUIET_SECONDS = os.environ.get("AUTO_REINDEX_QUIET_SECONDS", 10 * 60)
+    AUTO_REINDEX_CHECK_SECONDS = os.environ.get("AUTO_REINDEX_CHECK_SECONDS", 30)
+    RESTART_INDEX_START_TIMEOUT_SECONDS = os.environ.get(
+        "RESTART_INDEX_START_TIMEOUT_SECONDS", 15 * 60
+    )
+    RESTART_INDEX_COMPLETE_TIMEOUT_SECONDS = os.environ.get(
+        "RESTART_INDEX_COMPLETE_TIMEOUT_SECONDS", 4 * 60 * 60
+    )
+    SSE_CHECK_INTERVAL_SECONDS = os.environ.get("SSE_CHECK_INTERVAL_SECONDS", 1)
+    SSE_HEARTBEAT_SECONDS = os.environ.get("SSE_HEARTBEAT_SECONDS", 15)
+    SSE_MAX_STREAM_SECONDS = os.environ.get("SSE_MAX_STREAM_SECONDS", 10 * 60)
+    # Live event streams per worker; keep it below GUNICORN_THREADS.
+    SSE_MAX_STREAMS = os.environ.get("SSE_MAX_STREAMS", 4)
+    SSE_RETRY_SECONDS = os.environ.get("SSE_RETRY_SECONDS", 5)
+    WATCHER_ENABLED = (
+        True if os.environ.get("WATCHER_ENABLED", "True").lower() == "true" else False
+    )
+    WATCHER_BACKEND = os.environ.get("WATCHER_BACKEND", "auto")
+    WATCHER_DEBOUNCE_SECONDS = os.environ.get("WATCHER_DEBOUNCE_SECONDS", 2)
+    WATCHER_MAX_DELAY_SECONDS = os.environ.get("WATCHER_MAX_DELAY_SECONDS", 30)
+    WATCHER_POLL_INTERVAL_SECONDS = os.environ.get("WATCHER_POLL_INTERVAL_SECONDS", 10)
+    WATCHER_RECONCILE_SECONDS = os.environ.get("WATCHER_RECONCILE_SECONDS", 600)
+    # The active watcher refreshes a heartbeat file this often; it counts as
+    # gone after three missed beats.
+    WATCHER_HEARTBEAT_SECONDS = os.environ.get("WATCHER_HEARTBEAT_SECONDS", 5)
+    LOCK_DIR = os.environ.get("LOCK_DIR", "/tmp")
+    # Each gunicorn worker writes its metrics to this directory; /metrics merges them.
+    METRICS_DIR = os.environ.get(
+        "METRICS_DIR", os.path.join(LOCK_DIR, "pai-admin-metrics")
+    )
+    METRICS_FLUSH_SECONDS = os.environ.get("METRICS_FLUSH_SECONDS", 5)
+    # /metrics needs a logged-in user or "Authorization: Bearer <METRICS_TOKEN>".
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+    # Rendered pages of the file table, shared by all workers through this SQLite
+    # file. Set FRAGMENT_CACHE_MAX_BYTES to 0 to disable.
+    FRAGMENT_CACHE_PATH = os.environ.get(
+        "FRAGMENT_CACHE_PATH", os.path.join(LOCK_DIR, "pai-admin-fragments.db")
+    )
+    FRAGMENT_CACHE_MAX_BYTES = os.environ.get(
+        "FRAGMENT_CACHE_MAX_BYTES", 32 * 1024 * 1024
+    )
+    # Counters are shared by all gunicorn workers through this SQLite file; use
+    # "memory://" for per-process counters.
+    RATELIMIT_STORAGE_URI = os.environ.get(
+        "RATELIMIT_STORAGE_URI",
+        f"sqlite:///{os.path.join(LOCK_DIR, 'pai-admin-ratelimit.db')}",
+    )
+    RATELIMIT_STRATEGY = os.environ.get("RATELIMIT_STRATEGY", "moving-window")
@@ -0,0 +1,36 @@
+# Loaded automatically by gunicorn from the working directory (see start.sh).
+import os
+
+# Threaded workers, so long-lived Server-Sent Events connections from the
+# container modal do not each take up a whole worker process. Each open modal
+# still holds one thread, so SSE_MAX_STREAMS (default 4) caps them per worker
+# and leaves the other threads for ordinary requests; further modals fall back
+# to polling every SSE_RETRY_SECONDS. Raise GUNICORN_THREADS along with it
+# for more live modals.
+worker_class = "gthread"
+workers = int(os.environ.get("GUNICORN_WORKERS", 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+
+def on_starting(server):
+    from app.bin.cache import fragments
+    from app.services.metrics import metrics
+    from config import Config
+
+    # Counters from a previous run of the server must not be merged in.
+    metrics.configure(Config.METRICS_DIR, Config.METRICS_FLUSH_SECONDS)
+    metrics.clear_directory()
+    # Cached pages are keyed on the catalog generation, which starts over if
+    # the database is recreated.
+    fragments.configure(Config.FRAGMENT_CACHE_PATH, Config.FRAGMENT_CACHE_MAX_BYTES)
+    fragments.clear()
+
+
+def post_worker_init(worker):
+    from app.services.container import start_event_subscriber
+    from app.services.reindex import start_reindex_scheduler
+    from app.services.watcher import start_watcher
+
+    start_watcher(worker.wsgi)
+    start_event_subscriber(worker.wsgi)
+    start_reindex_scheduler(worker.wsgi)
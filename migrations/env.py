@@ -106,6 +106,11 @@ def run_migrations_online():
         with context.begin_transaction():
             context.run_migrations()
 
+        if connection.dialect.name == 'sqlite':
+            # Fold the WAL back into the database file, so app.db is complete
+            # on its own (e.g. for backups) right after an upgrade.
+            connection.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+
 
 if context.is_offline_mode():
     run_migrations_offline()
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import flask_migrate
+import pytest
+
+from config import Config
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+
+
+class TestConfig(Config):
+    TESTING = True
+    SECRET_KEY = "test"
+    WTF_CSRF_ENABLED = False
+    RATELIMIT_ENABLED = False
+    RATELIMIT_STORAGE_URI = "memory://"
+    LOG_TO_STDOUT = True
+    ACCESS_LOG_ENABLED = False
+    WATCHER_ENABLED = False
+    CHANGES_TOKEN = "test-token"
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = tmp_path / "data"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def app(tmp_path, data_dir, monkeypatch):
+    """An app on a migrated SQLite database and an empty data directory, both in
+    tmp_path."""
+    from app import create_app
+
+    attributes = {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.db'}",
+        "DATA_DIR": str(data_dir),
+        "LOCK_DIR": str(tmp_path),
+        "METRICS_DIR": str(tmp_path / "metrics"),
+        "FRAGMENT_CACHE_PATH": str(tmp_path / "fragments.db"),
+        "INDEX_RUNNING_FILE": str(tmp_path / "index.running"),
+        "INDEX_COMPLETE_FILE": str(tmp_path / "index.complete"),
+    }
+    monkeypatch.chdir(tmp_path)
+    app = create_app(type("WorkspaceConfig", (TestConfig,), attributes))
+    with app.app_context():
+        flask_migrate.upgrade(directory=str(MIGRATIONS_DIR))
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
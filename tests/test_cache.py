@@ -0,0 +1,84 @@
+import pytest
+
+from app.bin import cache as cache_module
+from app.bin.cache import SharedCache
+
+
+class Clock:
+    def __init__(self, now=1000.0) -> None:
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def shared_cache(tmp_path):
+    shared_cache = SharedCache()
+    shared_cache.configure(str(tmp_path / "cache.db"), max_bytes=10)
+    return shared_cache
+
+
+def test_values_are_shared_between_instances(tmp_path):
+    first = SharedCache()
+    first.configure(str(tmp_path / "cache.db"), max_bytes=100)
+    second = SharedCache()
+    second.configure(str(tmp_path / "cache.db"), max_bytes=100)
+
+    first.set("key", "value")
+
+    assert second.get("key") == "value"
+
+
+def test_least_recently_used_values_are_evicted_over_max_bytes(shared_cache, clock):
+    shared_cache.set("a", "aaaa")
+    clock.now += 2
+    shared_cache.set("b", "bbbb")
+    clock.now += 2
+    assert shared_cache.get("a") == "aaaa"
+    clock.now += 2
+
+    shared_cache.set("c", "cccc")
+
+    assert shared_cache.get("a") == "aaaa"
+    assert shared_cache.get("b") is None
+    assert shared_cache.get("c") == "cccc"
+
+
+def test_recency_is_only_updated_once_a_second(shared_cache, clock):
+    shared_cache.set("a", "aaaa")
+    shared_cache.set("b", "bbbb")
+    clock.now += 0.5
+    shared_cache.get("a")
+    clock.now += 0.5
+
+    shared_cache.set("c", "cccc")
+
+    # Both count as used at the same time; of tied keys the first one is kept.
+    assert shared_cache.get("a") == "aaaa"
+    assert shared_cache.get("b") is None
+
+
+def test_value_larger_than_max_bytes_is_not_stored(shared_cache):
+    shared_cache.set("small", "abc")
+
+    shared_cache.set("large", "x" * 11)
+
+    assert shared_cache.get("large") is None
+    assert shared_cache.get("small") == "abc"
+
+
+def test_disabled_cache_misses(tmp_path):
+    shared_cache = SharedCache()
+    shared_cache.configure(str(tmp_path / "cache.db"), max_bytes=0)
+
+    shared_cache.set("key", "value")
+
+    assert shared_cache.get("key", "default") == "default"
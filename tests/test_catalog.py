@@ -0,0 +1,98 @@
+import os
+
+import sqlalchemy as sa
+
+from app import db
+from app.models import File, FileChange
+from app.services.catalog import Catalog
+
+
+def make_catalog(data_dir):
+    return Catalog(data_dir, supported_extensions=["pdf", "txt"])
+
+
+def test_diff_reports_new_files_as_added(tmp_path):
+    changes = make_catalog(tmp_path).diff({}, [("docs/a.pdf", 10, 1.0)])
+
+    assert changes.added == [
+        {
+            "name": "a.pdf",
+            "full_name": "docs/a.pdf",
+            "extension": ".pdf",
+            "size": 10,
+            "mtime": 1.0,
+        }
+    ]
+    assert changes.usage == {".pdf": [1, 10]}
+    assert changes
+
+
+def test_diff_reports_size_or_mtime_changes_as_updated(tmp_path):
+    known = {"a.pdf": (1, 10, 1.0, "hash-a"), "b.txt": (2, 5, 1.0, "hash-b")}
+
+    changes = make_catalog(tmp_path).diff(
+        known, [("a.pdf", 12, 1.0), ("b.txt", 5, 2.0)]
+    )
+
+    assert changes.updated == [
+        {"id": 1, "full_name": "a.pdf", "size": 12, "mtime": 1.0},
+        {"id": 2, "full_name": "b.txt", "size": 5, "mtime": 2.0},
+    ]
+    assert changes.usage == {".pdf": [0, 2], ".txt": [0, 0]}
+    assert not changes.added and not changes.removed
+
+
+def test_diff_skips_unchanged_files(tmp_path):
+    known = {"a.pdf": (1, 10, 1.0, "hash-a")}
+
+    changes = make_catalog(tmp_path).diff(known, [("a.pdf", 10, 1.0)])
+
+    assert not changes
+    assert changes.unhashed == []
+
+
+def test_diff_reports_unchanged_files_without_hash_as_unhashed(tmp_path):
+    known = {"a.pdf": (1, 10, 1.0, None)}
+
+    changes = make_catalog(tmp_path).diff(known, [("a.pdf", 10, 1.0)])
+
+    assert changes.unhashed == [{"id": 1, "full_name": "a.pdf"}]
+    assert not changes
+
+
+def test_diff_reports_files_missing_from_disk_as_removed(tmp_path):
+    known = {"a.pdf": (1, 10, 1.0, "hash-a"), "b.txt": (2, 5, 1.0, "hash-b")}
+
+    changes = make_catalog(tmp_path).diff(known, iter([("a.pdf", 10, 1.0)]))
+
+    assert changes.removed == [(2, "b.txt")]
+    assert changes.usage == {".txt": [-1, -5]}
+    assert list(known) == ["b.txt"]
+
+
+def test_sync_journals_replaces_but_not_hash_backfills(app, data_dir):
+    (data_dir / "a.pdf").write_bytes(b"first")
+    catalog = Catalog.from_config()
+    catalog.sync()
+    file = db.session.scalar(sa.select(File))
+    assert file.content_hash is not None
+
+    # A row catalogued before content hashes existed is only backfilled.
+    db.session.execute(sa.update(File).values(content_hash=None))
+    db.session.commit()
+    changes = catalog.sync()
+    db.session.refresh(file)
+    assert [row["id"] for row in changes.unhashed] == [file.id]
+    assert file.content_hash is not None
+    actions = db.session.scalars(
+        sa.select(FileChange.action).order_by(FileChange.sequence)
+    ).all()
+    assert actions == ["add"]
+
+    (data_dir / "a.pdf").write_bytes(b"second version")
+    os.utime(data_dir / "a.pdf", (0, 0))
+    catalog.sync()
+    actions = db.session.scalars(
+        sa.select(FileChange.action).order_by(FileChange.sequence)
+    ).all()
+    assert actions == ["add", "replace"]
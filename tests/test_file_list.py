@@ -0,0 +1,97 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models import File
+from app.viewmodels.main.file_list_viewmodel import FileListViewModel
+
+
+def make_files(count):
+    files = [
+        File(
+            name=f"document-{i % 3}.pdf",
+            full_name=f"dir-{i}/document-{i % 3}.pdf",
+            extension=".pdf",
+            size=i % 4,
+            upload_date=datetime(2024, 1, 1 + i % 5),
+        )
+        for i in range(count)
+    ]
+    db.session.add_all(files)
+    db.session.commit()
+    return files
+
+
+def file_list(app, **args):
+    query = {
+        "columns[0][name]": args.pop("sort", "name"),
+        "order[0][column]": 0,
+        "order[0][dir]": args.pop("dir", "asc"),
+        **args,
+    }
+    with app.test_request_context("/files", query_string=query):
+        return FileListViewModel()
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+@pytest.mark.parametrize("sort", ["name", "size", "upload_date"])
+def test_cursor_round_trips(app, sort):
+    file = make_files(1)[0]
+
+    cursor = file_list(app, sort=sort).encode_cursor(file)
+
+    assert file_list(app, sort=sort, after=cursor).after == (
+        getattr(file, sort),
+        file.id,
+    )
+
+
+@pytest.mark.parametrize(
+    "sort, cursor",
+    [
+        ("name", "not base64!"),
+        ("name", base64.urlsafe_b64encode(b"not json").decode()),
+        ("name", raw_cursor({"value": "a", "id": 1})),
+        ("name", raw_cursor(["a", 1, 2])),
+        ("name", raw_cursor(["a", "1"])),
+        ("name", raw_cursor(["a", True])),
+        ("name", raw_cursor([1, 1])),
+        ("size", raw_cursor(["1", 1])),
+        ("size", raw_cursor([False, 1])),
+        ("upload_date", raw_cursor(["yesterday", 1])),
+    ],
+)
+def test_malformed_cursor_falls_back_to_offset(app, sort, cursor):
+    assert file_list(app, sort=sort, after=cursor).after is None
+
+
+@pytest.mark.parametrize("sort", ["name", "size", "upload_date"])
+@pytest.mark.parametrize("dir", ["asc", "desc"])
+def test_cursor_pages_match_offset_pages(app, sort, dir):
+    make_files(11)
+    offset_ids = [
+        row["id"]
+        for start in range(0, 11, 4)
+        for row in file_list(app, sort=sort, dir=dir, start=start, length=4).page()[
+            "data"
+        ]
+    ]
+
+    cursor_ids = []
+    cursor = None
+    while True:
+        args = {"after": cursor} if cursor else {}
+        page = file_list(app, sort=sort, dir=dir, length=4, **args).page()
+        cursor_ids.extend(row["id"] for row in page["data"])
+        cursor = page["cursor"]
+        if len(page["data"]) < 4:
+            break
+
+    assert cursor_ids == offset_ids
+    assert sorted(cursor_ids) == list(range(1, 12))
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from app import db
+from app.models import journal_file_changes
+from app.services.journal import ChangeJournal
+
+AUTHORIZATION = {"Authorization": "Bearer test-token"}
+
+
+@pytest.fixture
+def changes(app):
+    journal_file_changes(
+        "add", [{"full_name": f"file-{i}.pdf", "size": i} for i in range(7)]
+    )
+    db.session.commit()
+    journal_file_changes("delete", [{"full_name": "file-0.pdf"}])
+    db.session.commit()
+    return 8
+
+
+def test_since_pages_through_the_journal(changes):
+    pages = []
+    cursor = 0
+    while True:
+        page, more = ChangeJournal.since(cursor, 3)
+        pages.append([change.sequence for change in page])
+        if not more:
+            break
+        cursor = page[-1].sequence
+
+    assert pages == [[1, 2, 3], [4, 5, 6], [7, 8]]
+    assert ChangeJournal.latest_sequence() == changes
+
+
+def test_since_the_latest_sequence_is_empty(changes):
+    assert ChangeJournal.since(changes, 3) == ([], False)
+
+
+def test_changes_feed_follows_its_cursor(client, changes):
+    seen = []
+    cursor = 0
+    while True:
+        response = client.get(
+            "/changes",
+            query_string={"since": cursor, "limit": 5},
+            headers=AUTHORIZATION,
+        )
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body["latest"] == changes
+        seen.extend(
+            (change["sequence"], change["action"], change["path"])
+            for change in body["changes"]
+        )
+        cursor = body["cursor"]
+        if not body["more"]:
+            break
+
+    assert [sequence for sequence, _, _ in seen] == list(range(1, 9))
+    assert seen[-1] == (8, "delete", "file-0.pdf")
+    assert cursor == changes
+
+
+def test_changes_feed_requires_login_or_token(client, changes):
+    assert client.get("/changes").status_code == 401
+    assert (
+        client.get("/changes", headers={"Authorization": "Bearer wrong"}).status_code
+        == 401
+    )
+
+
+def test_manifest_has_every_change(app, data_dir, changes):
+    manifest = data_dir / app.config["CHANGE_MANIFEST_NAME"]
+
+    lines = [json.loads(line) for line in manifest.read_text().splitlines()]
+
+    assert [line["sequence"] for line in lines] == list(range(1, 9))
@@ -0,0 +1,112 @@
+import pytest
+from limits import parse
+from limits.strategies import FixedWindowRateLimiter, MovingWindowRateLimiter
+
+from app.bin import ratelimit as ratelimit_module
+from app.bin.ratelimit import SQLiteStorage
+
+
+class Clock:
+    def __init__(self, now=1000.0) -> None:
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit_module.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def uri(tmp_path):
+    return f"sqlite:///{tmp_path / 'ratelimit.db'}"
+
+
+@pytest.fixture
+def storage(uri):
+    return SQLiteStorage(uri)
+
+
+def test_counters_are_shared_between_instances(uri, storage):
+    other = SQLiteStorage(uri)
+
+    storage.incr("key", 60)
+    other.incr("key", 60)
+
+    assert storage.get("key") == 2
+    assert other.get("key") == 2
+
+
+def test_counter_starts_over_after_expiry(storage, clock):
+    storage.incr("key", 60)
+    storage.incr("key", 60)
+    assert storage.get_expiry("key") == 1060
+
+    clock.now += 60
+    assert storage.get("key") == 0
+    assert storage.incr("key", 60) == 1
+    assert storage.get_expiry("key") == 1120
+
+
+def test_elastic_expiry_extends_the_window(storage, clock):
+    storage.incr("key", 60, elastic_expiry=True)
+    clock.now += 30
+
+    storage.incr("key", 60, elastic_expiry=True)
+
+    assert storage.get_expiry("key") == 1090
+
+
+def test_moving_window_admits_up_to_the_limit(storage, clock):
+    assert storage.acquire_entry("key", 2, 60)
+    clock.now += 10
+    assert storage.acquire_entry("key", 2, 60)
+    assert not storage.acquire_entry("key", 2, 60)
+    assert storage.get_moving_window("key", 2, 60) == (1000, 2)
+
+    clock.now += 51
+    assert storage.get_moving_window("key", 2, 60) == (1010, 1)
+    assert storage.acquire_entry("key", 2, 60)
+    assert not storage.acquire_entry("key", 2, 60, amount=3)
+
+
+def test_expired_rows_are_purged(storage, clock):
+    storage.incr("counter", 10)
+    storage.acquire_entry("entry", 1, 10)
+
+    clock.now += storage.purge_interval + 10
+    storage.incr("other", 10)
+
+    connection = storage.connection()
+    counters = connection.execute("SELECT key FROM rate_limit_counter").fetchall()
+    entries = connection.execute("SELECT key FROM rate_limit_entry").fetchall()
+    assert counters == [("other",)]
+    assert entries == []
+
+
+def test_clear_and_reset(storage):
+    storage.incr("a", 60)
+    storage.incr("b", 60)
+    storage.acquire_entry("b", 5, 60)
+
+    storage.clear("a")
+    assert storage.get("a") == 0
+    assert storage.get("b") == 1
+
+    assert storage.reset() == 2
+    assert storage.get_moving_window("b", 5, 60)[1] == 0
+
+
+@pytest.mark.parametrize("strategy", [FixedWindowRateLimiter, MovingWindowRateLimiter])
+def test_limiter_strategies(storage, strategy):
+    limiter = strategy(storage)
+    limit = parse("2/minute")
+
+    assert limiter.hit(limit, "client")
+    assert limiter.hit(limit, "client")
+    assert not limiter.hit(limit, "client")
+    assert limiter.hit(limit, "other-client")
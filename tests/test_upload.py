@@ -0,0 +1,145 @@
+import base64
+import hashlib
+import io
+
+import pytest
+
+from app.services.upload import ChunkedUpload
+from app.services.upload.exceptions import (
+    ChecksumMismatch,
+    OffsetMismatch,
+    UploadConflict,
+    UploadError,
+    UploadNotFound,
+    UploadTooLarge,
+)
+
+CONTENT = b"0123456789abcdef"
+
+
+def sha256(data):
+    return hashlib.sha256(data).digest()
+
+
+def create(data_dir, content=CONTENT, checksum=None):
+    return ChunkedUpload.create(
+        data_dir, "report.pdf", len(content), max_length=1024, checksum=checksum
+    )
+
+
+def test_chunks_are_appended_at_the_current_offset(data_dir):
+    upload = create(data_dir)
+
+    assert upload.append(io.BytesIO(CONTENT[:6]), 0) == 6
+    # Another worker picks the upload up from its files.
+    upload = ChunkedUpload(data_dir, upload.id)
+    assert upload.offset == 6
+    assert upload.append(io.BytesIO(CONTENT[6:]), 6, sha256(CONTENT[6:])) == 16
+
+    assert upload.is_complete
+    assert upload.part_file.read_bytes() == CONTENT
+
+
+@pytest.mark.parametrize("offset", [0, 4, 10])
+def test_chunk_at_wrong_offset_is_rejected(data_dir, offset):
+    upload = create(data_dir)
+    upload.append(io.BytesIO(CONTENT[:6]), 0)
+
+    with pytest.raises(OffsetMismatch):
+        upload.append(io.BytesIO(CONTENT[offset:]), offset)
+
+    assert upload.offset == 6
+
+
+def test_chunk_with_wrong_checksum_is_cut_off(data_dir):
+    upload = create(data_dir)
+    upload.append(io.BytesIO(CONTENT[:6]), 0)
+
+    with pytest.raises(ChecksumMismatch):
+        upload.append(io.BytesIO(CONTENT[6:]), 6, sha256(b"something else"))
+
+    assert upload.offset == 6
+    assert upload.part_file.read_bytes() == CONTENT[:6]
+
+
+def test_chunk_past_declared_length_is_cut_off(data_dir):
+    upload = create(data_dir)
+
+    with pytest.raises(UploadTooLarge):
+        upload.append(io.BytesIO(CONTENT + b"extra"), 0)
+
+    assert upload.offset == 0
+
+
+def test_create_rejects_existing_and_oversized_files(data_dir):
+    (data_dir / "report.pdf").write_bytes(b"existing")
+    with pytest.raises(UploadConflict):
+        create(data_dir)
+
+    with pytest.raises(UploadTooLarge):
+        ChunkedUpload.create(data_dir, "big.pdf", 2048, max_length=1024)
+
+
+def test_finish_hands_the_verified_file_to_store(data_dir):
+    upload = create(data_dir, checksum=hashlib.sha256(CONTENT).hexdigest().upper())
+    upload.append(io.BytesIO(CONTENT), 0)
+    stored = []
+
+    def store(source, filename, content_hash):
+        stored.append((source.read_bytes(), filename, content_hash))
+        return "stored"
+
+    assert upload.finish(store) == "stored"
+    assert stored == [(CONTENT, "report.pdf", hashlib.sha256(CONTENT).hexdigest())]
+    with pytest.raises(UploadNotFound):
+        ChunkedUpload(data_dir, upload.id)
+
+
+def test_finish_rejects_incomplete_upload_and_keeps_it(data_dir):
+    upload = create(data_dir)
+    upload.append(io.BytesIO(CONTENT[:6]), 0)
+
+    with pytest.raises(OffsetMismatch):
+        upload.finish(lambda *args: pytest.fail("store must not be called"))
+
+    assert upload.offset == 6
+
+
+def test_finish_with_wrong_checksum_removes_upload(data_dir):
+    upload = create(data_dir, checksum=hashlib.sha256(b"other").hexdigest())
+    upload.append(io.BytesIO(CONTENT), 0)
+
+    with pytest.raises(ChecksumMismatch):
+        upload.finish(lambda *args: pytest.fail("store must not be called"))
+
+    assert not upload.part_file.exists()
+    assert not upload.info_file.exists()
+
+
+def test_finished_upload_cannot_be_appended_to_or_finished_again(data_dir):
+    upload = create(data_dir)
+    upload.append(io.BytesIO(CONTENT), 0)
+    upload.finish(lambda *args: None)
+
+    with pytest.raises(UploadNotFound):
+        upload.append(io.BytesIO(b""), 16)
+    with pytest.raises(UploadNotFound):
+        upload.finish(lambda *args: None)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        (f"sha256 {base64.b64encode(sha256(CONTENT)).decode()}", sha256(CONTENT)),
+        (f"SHA256 {base64.b64encode(sha256(CONTENT)).decode()}", sha256(CONTENT)),
+    ],
+)
+def test_parse_checksum(header, expected):
+    assert ChunkedUpload.parse_checksum(header) == expected
+
+
+@pytest.mark.parametrize("header", ["sha256", "sha256 not-base64!", "md5 AAAA"])
+def test_parse_checksum_rejects_malformed_headers(header):
+    with pytest.raises(UploadError):
+        ChunkedUpload.parse_checksum(header)